@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Game, Vote, Follow, Comment
+from .models import Game, GameStats, UserStats, FacetCount, GameActivityBucket, SimilarGame, Vote, Follow, Comment
 
 
 @admin.register(Game)
@@ -17,10 +17,77 @@ class GameAdmin(admin.ModelAdmin):
         'votes_count',
         'followers_count',
         'comments_count',
+        'removed_at',
     )
-    list_filter = ('platform', 'genre', 'source', 'release_date')
+    list_filter = ('platform', 'genre', 'source', 'release_date', 'removed_at')
     search_fields = ('title', 'developer', 'publisher', 'description')
-    readonly_fields = ('id', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'created_at', 'updated_at', 'removed_at')
+    list_select_related = ('stats',)
+
+    def get_queryset(self, request):
+        # Removed games stay editable here
+        queryset = Game.all_objects.all()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+
+@admin.register(GameStats)
+class GameStatsAdmin(admin.ModelAdmin):
+    list_display = ('game', 'vote_count', 'vote_sum', 'follower_count', 'comment_count')
+    search_fields = ('game__title',)
+    list_select_related = ('game',)
+
+    def has_change_permission(self, request, obj=None):
+        # Counters are maintained by the write paths and rebuild_game_stats
+        return False
+
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'vote_count', 'average_score', 'follow_count', 'comment_count')
+    search_fields = ('user__username',)
+    list_select_related = ('user',)
+
+    def has_change_permission(self, request, obj=None):
+        # Counters are maintained by the write paths and rebuild_user_stats
+        return False
+
+
+@admin.register(FacetCount)
+class FacetCountAdmin(admin.ModelAdmin):
+    list_display = ('facet', 'value', 'count')
+    list_filter = ('facet',)
+    search_fields = ('value',)
+
+    def has_change_permission(self, request, obj=None):
+        # Maintained by Game signals and rebuild_facet_counts
+        return False
+
+
+@admin.register(GameActivityBucket)
+class GameActivityBucketAdmin(admin.ModelAdmin):
+    list_display = ('game', 'hour', 'span_hours', 'votes', 'follows', 'comments')
+    list_filter = ('span_hours',)
+    search_fields = ('game__title',)
+    list_select_related = ('game',)
+
+    def has_change_permission(self, request, obj=None):
+        # Maintained by the vote, follow and comment writes and compact_activity
+        return False
+
+
+@admin.register(SimilarGame)
+class SimilarGameAdmin(admin.ModelAdmin):
+    list_display = ('game', 'similar', 'kind', 'score', 'computed_at')
+    list_filter = ('kind',)
+    search_fields = ('game__title', 'similar__title')
+    list_select_related = ('game', 'similar')
+
+    def has_change_permission(self, request, obj=None):
+        # Written by build_recommendations
+        return False
 
 
 @admin.register(Vote)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GamerankCoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.gamerank_core"
+
+    def ready(self):
+        import apps.gamerank_core.signals  # noqa
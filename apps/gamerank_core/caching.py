@@ -0,0 +1,170 @@
+"""
+Page and fragment caching with precise, signal-driven invalidation.
+
+Cached entries are never deleted one by one. Each entry's key includes the
+current generation token of the scopes it depends on: ``game:<id>`` for a
+game's page and ``games`` for the game list. Writes replace the token
+(``invalidate_game``, called from the model signals and from the bulk vote
+path) once their transaction commits, so later reads build new keys and the
+old entries simply expire. Tokens are random rather than counters, so an
+evicted token can never bring back a stale page.
+
+* ``cache_anonymous_page`` caches whole responses for visitors who are not
+  signed in and have no flash messages waiting.
+* The ``{% cachefragment %}`` tag (see templatetags) caches rendered template
+  fragments, keyed by values that change with the data, such as
+  ``GameStats.version``.
+
+Hits, misses and invalidations are counted in the cache itself (shared by
+all processes with a shared backend); ``python manage.py cache_stats``
+prints them together with the backend's own eviction count where the
+backend reports one (Redis).
+"""
+import hashlib
+import uuid
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+
+PAGE_CACHE_TIMEOUT = 10 * 60
+STATS_KINDS = ('page', 'fragment')
+STATS_EVENTS = ('hit', 'miss')
+
+
+def generation_key(scope: str) -> str:
+    return f'gamerank:cache-gen:{scope}'
+
+
+def stats_key(kind: str, event: str) -> str:
+    return f'gamerank:cache-stats:{kind}:{event}'
+
+
+def generations(scopes: Iterable[str]) -> List[str]:
+    """Get the current generation token of each scope, starting new ones where missing."""
+    scopes = list(scopes)
+    keys = [generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    tokens = []
+    for key in keys:
+        token = found.get(key)
+        if token is None:
+            token = uuid.uuid4().hex[:12]
+            # add() so concurrent readers agree on one token
+            if not cache.add(key, token, None):
+                token = cache.get(key, token)
+        tokens.append(token)
+    return tokens
+
+
+def invalidate(*scopes: str) -> None:
+    """Start new generations of the scopes when the current transaction commits."""
+    def bump() -> None:
+        cache.set_many({generation_key(scope): uuid.uuid4().hex[:12] for scope in scopes}, None)
+        count('invalidate', 'total', len(scopes))
+    transaction.on_commit(bump)
+
+
+def invalidate_game(game_id: str, listing: bool = True) -> None:
+    """Invalidate a game's cached pages, and the game list if its ranking or cards may change."""
+    invalidate_games([game_id], listing)
+
+
+def invalidate_games(game_ids: Iterable[str], listing: bool = True) -> None:
+    scopes = [f'game:{game_id}' for game_id in game_ids]
+    if scopes:
+        invalidate(*scopes, *(['games'] if listing else []))
+
+
+def count(kind: str, event: str, n: int = 1) -> None:
+    key = stats_key(kind, event)
+    try:
+        cache.incr(key, n)
+    except ValueError:
+        # First event since the counters were reset (or evicted)
+        if not cache.add(key, n, None):
+            cache.incr(key, n)
+
+
+def get_stats() -> Dict[str, int]:
+    """Get the hit, miss and invalidation counters, plus backend evictions if known."""
+    keys = {f'{kind}_{event}': stats_key(kind, event) for kind in STATS_KINDS for event in STATS_EVENTS}
+    keys['invalidations'] = stats_key('invalidate', 'total')
+    values = cache.get_many(list(keys.values()))
+    result = {name: values.get(key, 0) for name, key in keys.items()}
+    evictions = backend_evictions()
+    if evictions is not None:
+        result['backend_evictions'] = evictions
+    return result
+
+
+def reset_stats() -> None:
+    cache.delete_many(
+        [stats_key(kind, event) for kind in STATS_KINDS for event in STATS_EVENTS]
+        + [stats_key('invalidate', 'total')]
+    )
+
+
+def backend_evictions() -> Optional[int]:
+    """Keys the backend evicted for lack of memory, if it reports that (Redis does)."""
+    get_client = getattr(getattr(cache, '_cache', None), 'get_client', None)
+    if get_client is None:
+        return None
+    try:
+        return get_client().info('stats').get('evicted_keys')
+    except Exception:
+        return None
+
+
+def cache_anonymous_page(scopes: Callable[..., Iterable[str]], timeout: int = PAGE_CACHE_TIMEOUT) -> Callable:
+    """Cache a view's responses for anonymous visitors, keyed by the scopes' generations.
+
+    ``scopes`` gets the view's arguments and returns the scopes the page depends on.
+    """
+    def decorator(view_func: Callable) -> Callable:
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+            tokens = generations(scopes(request, *args, **kwargs))
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f'gamerank:page:{path}:{":".join(tokens)}'
+            response = cache.get(key)
+            if response is not None:
+                count('page', 'hit')
+                return response
+            count('page', 'miss')
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                if hasattr(response, 'render'):
+                    response.render()
+                cache.set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def request_viewer(request) -> Tuple[Optional[int], bool]:
+    """Get the viewer's user id and whether they passed the site login.
+
+    Costs no query when the request carries a valid auth token (see
+    gamerank_users.authtoken).
+    """
+    auth = getattr(request, 'auth', None)  # Set by CustomAuthMiddleware
+    if auth is None:
+        return request.user.pk, bool(request.session.get('auth'))
+    return auth.user_id, auth.signed_in
+
+
+def _cacheable_request(request) -> bool:
+    if not getattr(settings, 'ENABLE_PAGE_CACHE', False) or request.method not in ('GET', 'HEAD'):
+        return False
+    # Checked without loading the session when the visitor has none
+    if request.COOKIES.get(settings.SESSION_COOKIE_NAME):
+        user_id, signed_in = request_viewer(request)
+        if user_id is not None or signed_in:
+            return False
+    return not len(get_messages(request))
@@ -0,0 +1,49 @@
+"""
+Small database helpers shared by the denormalized read models.
+"""
+from typing import Dict, Iterable, Sequence, Tuple, Type
+
+from django.db import connection, models
+
+
+def increment_rows(
+    model: Type[models.Model],
+    key_fields: Sequence[str],
+    counter_fields: Sequence[str],
+    rows: Iterable[Tuple],
+) -> None:
+    """Add to counters, inserting missing rows, in one statement per batch.
+
+    Each row is the key values followed by the counter deltas. Runs
+    ``INSERT ... ON CONFLICT (keys) DO UPDATE SET c = c + excluded.c``, which
+    SQLite (3.24+) and PostgreSQL both support; Django's own
+    ``update_conflicts`` can only overwrite values, not add to them.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    opts = model._meta
+    table = connection.ops.quote_name(opts.db_table)
+    keys = [connection.ops.quote_name(opts.get_field(name).column) for name in key_fields]
+    counters = [connection.ops.quote_name(opts.get_field(name).column) for name in counter_fields]
+    placeholders = '(' + ', '.join(['%s'] * (len(keys) + len(counters))) + ')'
+    updates = ', '.join(f'{column} = {table}.{column} + excluded.{column}' for column in counters)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(keys + counters)}) '
+                f'VALUES {", ".join([placeholders] * len(batch))} '
+                f'ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates}',
+                [value for row in batch for value in row],
+            )
+
+
+def merge_deltas(deltas: Dict[Tuple, int], key: Tuple, delta: int) -> None:
+    """Accumulate a delta for key, dropping keys whose deltas cancel out."""
+    total = deltas.get(key, 0) + delta
+    if total:
+        deltas[key] = total
+    else:
+        deltas.pop(key, None)
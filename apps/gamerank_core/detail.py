@@ -0,0 +1,105 @@
+"""
+Cached read model of the game detail page.
+
+Everything on the page that is the same for every visitor (the game and its
+stats, the first page of comments and the neighbour lists) is cached as one
+entry keyed by ``GameStats.version``, which every write to the game or its
+counters bumps, so a write never needs to find and delete cache entries.
+The version and the visitor's own vote and follow are read in a single
+primary key query; on a warm cache that is the only query the page runs.
+
+Neighbours come from the batch recommendation job, which does not bump the
+version; entries expire after ``DETAIL_CACHE_TIMEOUT`` to pick them up.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Exists, Subquery
+from django.http import Http404
+
+from . import stats
+from .models import Comment, Follow, Game, GameStats, PendingVote, SimilarGame, Vote
+from .pagination import KeysetPaginator
+from .recommendations import similar_games
+from .votes import buffering_enabled
+
+DETAIL_CACHE_TIMEOUT = 5 * 60
+COMMENTS_PER_PAGE = 20
+
+
+def detail_cache_key(game_id: str, version: int) -> str:
+    return f'gamerank:game-detail:{game_id}:{version}'
+
+
+def comments_page(game_id: str, cursor: Optional[str] = None):
+    """Get a page of a game's comments, newest first, with their authors."""
+    paginator = KeysetPaginator(
+        Comment.objects.filter(game_id=game_id).select_related('user'),
+        ('-created_at', '-id'),
+        COMMENTS_PER_PAGE,
+    )
+    return paginator.page(cursor)
+
+
+def get_game_detail(game_id: str, user_id: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Get the shared detail data of a game and the user's vote and follow on it.
+
+    Raises Http404 if the game does not exist.
+    """
+    row = _version_and_user_state(game_id, user_id)
+    if row is None:
+        if not Game.objects.filter(pk=game_id).exists():
+            raise Http404('No Game matches the given query.')
+        # The game predates the stats table
+        stats.rebuild_game_stats([game_id])
+        row = _version_and_user_state(game_id, user_id)
+    version, user_state = row
+
+    key = detail_cache_key(game_id, version)
+    data = cache.get(key)
+    if data is None:
+        data = _load_detail(game_id)
+        cache.set(key, data, DETAIL_CACHE_TIMEOUT)
+    return data, user_state
+
+
+def _version_and_user_state(game_id: str, user_id: Optional[int]) -> Optional[Tuple[int, Dict[str, Any]]]:
+    queryset = GameStats.objects.filter(game_id=game_id)
+    fields = ['version']
+    if user_id is not None:
+        votes = Vote.objects.filter(game_id=game_id, user_id=user_id).order_by()
+        queryset = queryset.annotate(
+            user_vote=Subquery(votes.values('score')[:1]),
+            user_follow=Exists(Follow.objects.filter(game_id=game_id, user_id=user_id)),
+        )
+        fields += ['user_vote', 'user_follow']
+        if buffering_enabled():
+            # A vote still in the write-behind buffer is newer than the stored one
+            pending = PendingVote.objects.filter(game_id=game_id, user_id=user_id).order_by('-id')
+            queryset = queryset.annotate(pending_vote=Subquery(pending.values('score')[:1]))
+            fields.append('pending_vote')
+    row = queryset.values(*fields).first()
+    if row is None:
+        return None
+    pending = row.pop('pending_vote', None)
+    if pending is not None:
+        row['user_vote'] = pending
+    return row.pop('version'), row
+
+
+def _load_detail(game_id: str) -> Dict[str, Any]:
+    try:
+        game = Game.objects.select_related('stats').get(pk=game_id)
+    except Game.DoesNotExist:
+        raise Http404('No Game matches the given query.')
+    page = comments_page(game_id)
+    also_liked = list(similar_games(game))
+    # Games without votes (e.g. fresh imports) still have content neighbours
+    similar = [] if also_liked else list(similar_games(game, SimilarGame.KIND_CONTENT))
+    return {
+        'game': game,
+        'comments': page.object_list,
+        'next_cursor': page.next_cursor,
+        'also_liked': also_liked,
+        'similar': similar,
+    }
@@ -0,0 +1,103 @@
+"""
+ETags for conditional GETs, for use with ``django.views.decorators.http.condition``.
+
+Each validator is read with one indexed lookup, so an unchanged page is
+answered with a 304 before any template is rendered or aggregate run:
+
+* a game's comments fragment: the comment count and last comment write;
+* a game (detail page and JSON): ``GameStats.version``, which every vote,
+  follow and comment write bumps, and ``Game.updated_at`` for writes that
+  bypass model signals (bulk imports);
+* the game list: the newest ``Game.updated_at`` and
+  ``GameStats.votes_changed_at``, the only inputs of its ranking, and the
+  number of games (from ``FacetCount``), which a deletion changes;
+* the user pages: ``UserStats.version``, bumped on the user's own writes.
+
+HTML pages also depend on who is looking (navbar, own vote, CSRF token), so
+their ETags include the viewer. Pages with flash messages waiting are never
+answered with a 304.
+"""
+import hashlib
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Max, Sum
+
+from .caching import request_viewer
+from .models import FacetCount, Game, GameStats, PendingVote, UserStats
+from .votes import buffering_enabled
+
+
+def game_etag(request, pk) -> Optional[str]:
+    """ETag of a game's JSON: its activity version and last edit."""
+    row = GameStats.objects.filter(game_id=pk).values_list('version', 'game__updated_at').first()
+    if row is None:
+        return None
+    version, updated_at = row
+    return f'game-{pk}-{version}-{updated_at.timestamp()}'
+
+
+def game_page_etag(request, pk) -> Optional[str]:
+    """ETag of a game's detail page, for the current viewer."""
+    viewer = viewer_key(request)
+    etag = game_etag(request, pk)
+    if viewer is None or etag is None:
+        return None
+    user_id, _ = request_viewer(request)
+    if buffering_enabled() and user_id is not None:
+        # A queued vote shows on the page before it reaches the stats version
+        pending = (
+            PendingVote.objects.filter(user_id=user_id, game_id=pk)
+            .order_by('-id').values_list('id', flat=True).first()
+        )
+        etag = f'{etag}-{pending or 0}'
+    return f'{etag}-{viewer}'
+
+
+def comments_etag(request, pk) -> Optional[str]:
+    """ETag of a comments fragment: changes with every comment write on the game."""
+    row = GameStats.objects.filter(game_id=pk).values_list('comment_count', 'comments_changed_at').first()
+    if row is None:
+        return None
+    count, changed_at = row
+    version = changed_at.timestamp() if changed_at else 0
+    return f'{pk}-{count}-{version}-{_params_key(request)}'
+
+
+def game_list_etag(request) -> Optional[str]:
+    """ETag of a game list page: the newest game edit and vote, the catalog size, the query string and the viewer."""
+    viewer = viewer_key(request)
+    if viewer is None:
+        return None
+    # Removing a game from its feed updates it, so removed games count too
+    game_changed = Game.all_objects.aggregate(changed=Max('updated_at'))['changed']
+    votes_changed = GameStats.objects.aggregate(changed=Max('votes_changed_at'))['changed']
+    versions = '-'.join(str(changed.timestamp()) if changed else '0' for changed in (game_changed, votes_changed))
+    # Deleting a game changes neither date; the per-source facet counts add up to the catalog size
+    games = FacetCount.objects.filter(facet='source').aggregate(total=Sum('count'))['total'] or 0
+    return f'games-{versions}-{games}-{_params_key(request)}-{viewer}'
+
+
+def user_page_etag(request) -> Optional[str]:
+    """ETag of the signed-in user's votes and follows pages."""
+    viewer = viewer_key(request)
+    if viewer is None or not request.user.is_authenticated:
+        return None
+    # Read from the database, never from a copy another worker may have changed since
+    version = UserStats.objects.filter(user_id=request.user.pk).values_list('version', flat=True).first() or 0
+    return f'user-{request.user.pk}-{version}-{_params_key(request)}-{viewer}'
+
+
+def viewer_key(request) -> Optional[str]:
+    """Identify what a page shows about the viewer, or None if it must not be served from a cache."""
+    if len(get_messages(request)):
+        return None
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    user_id, signed_in = request_viewer(request)
+    key = f'{user_id or 0}:{int(signed_in)}:{csrf}'
+    return hashlib.md5(key.encode()).hexdigest()[:12]
+
+
+def _params_key(request) -> str:
+    return hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:12]
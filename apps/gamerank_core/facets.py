@@ -0,0 +1,116 @@
+"""
+Faceted filtering of the game list by platform, genre, source and release year.
+
+Facet counts are read from the FacetCount table, which Game saves and
+deletes keep up to date by delta (see signals.py). Bulk writers that skip
+model signals must call rebuild_facet_counts() afterwards.
+"""
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, QuerySet
+from django.db.models.functions import ExtractYear
+
+from .db import increment_rows, merge_deltas
+from .models import FacetCount, Game
+
+FACETS = ('platform', 'genre', 'source', 'year')
+FACET_LABELS = {
+    'platform': 'Platform',
+    'genre': 'Genre',
+    'source': 'Source',
+    'year': 'Release year',
+}
+
+
+def game_facets(game: Game) -> Optional[Dict[str, str]]:
+    """Get the facet values of a game, or None if some of its fields were not loaded."""
+    loaded = game.__dict__
+    if any(field not in loaded for field in ('platform', 'genre', 'source', 'release_date')):
+        return None
+    release_date = game.release_date
+    year = getattr(release_date, 'year', None) or str(release_date)[:4]
+    return {
+        'platform': game.platform,
+        'genre': game.genre,
+        'source': game.source,
+        'year': str(year),
+    }
+
+
+def apply_game_change(old: Optional[Mapping[str, str]], new: Optional[Mapping[str, str]]) -> None:
+    """Move a game's contribution from its old facet values to its new ones."""
+    deltas: Dict[Tuple[str, str], int] = {}
+    for values, delta in ((old, -1), (new, 1)):
+        if values:
+            for facet in FACETS:
+                merge_deltas(deltas, (facet, values[facet]), delta)
+    increment_rows(
+        FacetCount,
+        ['facet', 'value'],
+        ['count'],
+        [(facet, value, delta) for (facet, value), delta in deltas.items()],
+    )
+
+
+def rebuild_facet_counts() -> int:
+    """Recompute every facet count from the game table, returning the number of rows."""
+    rows = []
+    for facet in ('platform', 'genre', 'source'):
+        counts = Game.objects.order_by().values_list(facet).annotate(n=Count('pk'))
+        rows += [FacetCount(facet=facet, value=value, count=n) for value, n in counts]
+    years = (
+        Game.objects.order_by()
+        .annotate(year=ExtractYear('release_date'))
+        .values_list('year')
+        .annotate(n=Count('pk'))
+    )
+    rows += [FacetCount(facet='year', value=str(year), count=n) for year, n in years]
+
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def get_facets(limit: int = 15) -> Dict[str, List[Tuple[str, int]]]:
+    """Get the most common values of every facet with their game counts, in one query."""
+    facets: Dict[str, List[Tuple[str, int]]] = {facet: [] for facet in FACETS}
+    for facet, value, count in FacetCount.objects.filter(count__gt=0).order_by().values_list('facet', 'value', 'count'):
+        if facet in facets:
+            facets[facet].append((value, count))
+    for facet, values in facets.items():
+        if facet == 'year':
+            values.sort(reverse=True)
+        else:
+            values.sort(key=lambda item: (-item[1], item[0]))
+        del values[limit:]
+    return facets
+
+
+def is_valid_year(value: str) -> bool:
+    """Whether a year filter value can be queried (dates only go from year 1 to 9999)."""
+    return value.isascii() and value.isdigit() and 1 <= int(value) <= 9999
+
+
+def get_active_filters(params: Mapping[str, str]) -> Dict[str, str]:
+    """Extract the facet filters present in the query parameters, dropping invalid years."""
+    active = {}
+    for facet in FACETS:
+        value = params.get(facet, '').strip()
+        if facet == 'year' and not is_valid_year(value):
+            continue
+        if value:
+            active[facet] = value
+    return active
+
+
+def filter_games(queryset: QuerySet, active: Mapping[str, str]) -> QuerySet:
+    """Apply facet filters to a Game queryset."""
+    for facet, value in active.items():
+        if facet == 'year':
+            # Translated to a release_date range, so the date index applies
+            queryset = queryset.filter(release_date__year=int(value))
+        else:
+            queryset = queryset.filter(**{facet: value})
+    return queryset
@@ -0,0 +1,149 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Avg
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.views.generic.list import MultipleObjectMixin
+
+from apps.gamerank_core.models import Game, Vote
+from apps.gamerank_core.pagination import KeysetPaginator
+from apps.gamerank_core.stats import rebuild_game_stats
+from apps.gamerank_core.views import GameListView
+
+
+class LegacyGameListView(GameListView):
+    """The home view as it was before the rank column: aggregate, sort and OFFSET on every request."""
+
+    def get_queryset(self):
+        return Game.objects.annotate(
+            avg_score=Avg('votes__score')
+        ).order_by('-avg_score', 'title')
+
+    def paginate_queryset(self, queryset, page_size):
+        # Django's offset paginator (?page=N), not the keyset mixin and its rank ordering
+        return MultipleObjectMixin.paginate_queryset(self, queryset, page_size)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark home page latency with the rank column versus on-the-fly aggregation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=10_000, help='Number of synthetic games (default: 10000)')
+        parser.add_argument('--votes', type=int, default=1_000_000, help='Number of synthetic votes (default: 1000000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests timed per page (default: 5)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic data')
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the synthetic data instead of rolling it back'
+        )
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if options['games'] < 1 or options['votes'] < 0:
+            raise CommandError('--games must be positive and --votes non-negative')
+        random.seed(options['seed'])
+
+        with transaction.atomic():
+            self._populate(options['games'], options['votes'])
+            self._report(options['repeat'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def _populate(self, n_games: int, n_votes: int) -> None:
+        started = time.perf_counter()
+        first_day = date(2000, 1, 1)
+        games = [
+            Game(
+                id=f'BENCH-{i}',
+                title=f'Benchmark Game {i}',
+                platform='PC (Windows)',
+                genre=random.choice(['Shooter', 'MMORPG', 'Strategy', 'Card Game', 'Racing']),
+                developer='Bench Studio',
+                publisher='Bench Publishing',
+                release_date=first_day + timedelta(days=i % 9000),
+                description='Synthetic game used by bench_ranking.',
+                image_url='https://example.com/thumbnail.jpg',
+                source='BENCH',
+            )
+            for i in range(n_games)
+        ]
+        Game.objects.bulk_create(games, batch_size=1000)
+
+        # Every user votes on a distinct subset of games, respecting (user, game) uniqueness
+        per_user = n_games
+        n_users = max(1, -(-n_votes // per_user))
+        users = User.objects.bulk_create(
+            [User(username=f'bench-user-{i}', password='!') for i in range(n_users)],
+            batch_size=1000,
+        )
+        game_ids = [game.id for game in games]
+        # Skew scores per game so the ranking is not flat
+        base_scores = {game_id: random.uniform(0, 5) for game_id in game_ids}
+        remaining = n_votes
+        for user in users:
+            chosen = random.sample(game_ids, min(per_user, remaining))
+            batch = [
+                Vote(user=user, game_id=game_id, score=min(5, max(0, round(random.gauss(base_scores[game_id], 1)))))
+                for game_id in chosen
+            ]
+            Vote.objects.bulk_create(batch, batch_size=5000)
+            remaining -= len(batch)
+            if remaining <= 0:
+                break
+
+        for start in range(0, n_games, 1000):
+            rebuild_game_stats(game_ids[start:start + 1000])
+
+        self.stdout.write(
+            f'Populated {n_games} games, {n_users} users and {n_votes} votes '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+    def _report(self, repeat: int) -> None:
+        factory = RequestFactory()
+        total_pages = -(-Game.objects.count() // GameListView.paginate_by)
+        pages = [1, max(1, total_pages // 2), total_pages]
+
+        cases = (
+            ('legacy', LegacyGameListView, lambda page: {'page': page}),
+            ('ranked', GameListView, lambda page: self._cursor_params(page)),
+        )
+        self.stdout.write(f'{"view":<10}{"page":>8}{"median ms":>12}{"queries":>10}')
+        # Time the views themselves, not the anonymous page cache
+        with override_settings(ENABLE_PAGE_CACHE=False):
+            for label, view_class, params in cases:
+                view = view_class.as_view()
+                for page in pages:
+                    request = factory.get('/', params(page))
+                    request.user = AnonymousUser()
+                    request.session = {}
+                    timings, queries = self._time(lambda: view(request).render(), repeat)
+                    self.stdout.write(f'{label:<10}{page:>8}{statistics.median(timings):>12.1f}{queries:>10}')
+
+    def _cursor_params(self, page: int) -> Dict[str, str]:
+        """Query string of a deep page of the keyset-paginated view, as its "next" links would build it."""
+        if page <= 1:
+            return {}
+        per_page = GameListView.paginate_by
+        paginator = KeysetPaginator(GameListView().get_queryset(), GameListView.cursor_ordering, per_page)
+        # The last game of the previous page; found once here, outside the timings
+        last = paginator.queryset.order_by(*paginator.ordering)[(page - 1) * per_page - 1]
+        return {GameListView.cursor_kwarg: paginator.encode_cursor(last, 'next')}
+
+    def _time(self, func: Callable[[], Any], repeat: int) -> tuple[List[float], int]:
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(captured)
+        return timings, queries
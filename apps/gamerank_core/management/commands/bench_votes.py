@@ -0,0 +1,94 @@
+import random
+import time
+from datetime import date
+from typing import Any, Dict, List
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.gamerank_core.models import Game, GameStats, PendingVote, Vote
+from apps.gamerank_core.votes import flush_vote_buffer, queue_votes, record_votes
+
+HOT_GAME_ID = 'BENCH-VOTES-HOT'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sustained votes/sec on one hot game, applied directly versus through the write-behind buffer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Number of synthetic voters (default: 2000)')
+        parser.add_argument('--rounds', type=int, default=2, help='Votes per user; later rounds change scores (default: 2)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Flush batch size (default: 1000)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic scores')
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if options['users'] < 1 or options['rounds'] < 1:
+            raise CommandError('--users and --rounds must be positive')
+        random.seed(options['seed'])
+
+        # Every vote commits on its own, as in production, so the data is
+        # real and removed afterwards instead of rolled back.
+        game = Game.objects.create(
+            id=HOT_GAME_ID,
+            title='Benchmark Hot Game',
+            platform='PC (Windows)',
+            genre='Shooter',
+            developer='Bench Studio',
+            publisher='Bench Publishing',
+            release_date=date(2025, 1, 1),
+            description='Synthetic game used by bench_votes.',
+            image_url='https://example.com/thumbnail.jpg',
+            source='BENCH',
+        )
+        users = User.objects.bulk_create(
+            [User(username=f'bench-voter-{i}', password='!') for i in range(options['users'])],
+            batch_size=1000,
+        )
+        user_ids = [user.pk for user in users]
+        votes = [
+            (user_id, random.randint(0, 5))
+            for _ in range(options['rounds'])
+            for user_id in user_ids
+        ]
+
+        try:
+            self._report('direct', *self._run_direct(votes))
+            Vote.objects.filter(game=game).delete()
+            self._report('buffered', *self._run_buffered(votes, options['batch_size']))
+            self._check(game, votes)
+        finally:
+            PendingVote.objects.filter(game=game).delete()
+            game.delete()
+            User.objects.filter(pk__in=user_ids).delete()
+
+    def _run_direct(self, votes: List[tuple]) -> tuple:
+        started = time.perf_counter()
+        for user_id, score in votes:
+            record_votes(user_id, {HOT_GAME_ID: score})
+        elapsed = time.perf_counter() - started
+        return len(votes), elapsed, elapsed
+
+    def _run_buffered(self, votes: List[tuple], batch_size: int) -> tuple:
+        started = time.perf_counter()
+        for user_id, score in votes:
+            queue_votes(user_id, {HOT_GAME_ID: score})
+        accepted = time.perf_counter() - started
+        while flush_vote_buffer(batch_size):
+            pass
+        return len(votes), accepted, time.perf_counter() - started
+
+    def _report(self, label: str, count: int, accepted: float, applied: float) -> None:
+        self.stdout.write(
+            f'{label:<10}{count:>8} votes  accepted {count / accepted:>9.0f}/s  '
+            f'applied {count / applied:>9.0f}/s'
+        )
+
+    def _check(self, game: Game, votes: List[tuple]) -> None:
+        latest = dict(votes)
+        stats = GameStats.objects.get(game=game)
+        if stats.vote_count != len(latest) or stats.vote_sum != sum(latest.values()):
+            raise CommandError(
+                f'Stats mismatch after flushing: {stats.vote_count} votes / {stats.vote_sum} '
+                f'(expected {len(latest)} / {sum(latest.values())})'
+            )
+        self.stdout.write(self.style.SUCCESS('Buffered votes produced the same stats as direct writes.'))
@@ -0,0 +1,85 @@
+import time
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.gamerank_core import recommendations
+from apps.gamerank_core.models import SimilarGame
+
+
+class Command(BaseCommand):
+    help = 'Compute the "players also liked" (votes) and "similar games" (content) neighbours of every game'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=['votes', 'content', 'all'],
+            default='all',
+            help='Which neighbours to compute (default: all)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute every game instead of only those changed since the last run'
+        )
+        parser.add_argument('--since', help='Refresh games whose votes or content changed after this ISO datetime')
+        parser.add_argument('--top-k', type=int, default=20, help='Neighbours stored per game (default: 20)')
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=None,
+            help='Games per similarity block (default: sized to about 64 MB)'
+        )
+        parser.add_argument('--min-common', type=int, default=3, help='Minimum players who voted on both games')
+        parser.add_argument('--shrinkage', type=float, default=10.0, help='Damping for games with few co-voters')
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if options['top_k'] < 1 or options['min_common'] < 1 or options['shrinkage'] < 0:
+            raise CommandError('--top-k and --min-common must be positive and --shrinkage non-negative')
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since datetime: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        kinds = [SimilarGame.KIND_VOTES, SimilarGame.KIND_CONTENT] if options['kind'] == 'all' else [options['kind']]
+        for kind in kinds:
+            try:
+                self._build(kind, since, options)
+            except ImportError as exc:
+                raise CommandError(str(exc))
+
+    def _build(self, kind: str, since, options: Dict[str, Any]) -> None:
+        # Taken before reading the data, so writes during the run are picked up next time
+        started_at = timezone.now()
+        game_ids = None
+        if not options['full']:
+            since = since or recommendations.last_build_time(kind)
+            if since is not None:
+                game_ids = recommendations.changed_game_ids(kind, since)
+                if not game_ids:
+                    self.stdout.write(f'{kind}: nothing changed since the last run.')
+                    return
+
+        started = time.perf_counter()
+        if kind == SimilarGame.KIND_VOTES:
+            matrix = recommendations.load_vote_matrix(options['min_common'], options['shrinkage'])
+        else:
+            matrix = recommendations.load_content_matrix()
+        self.stdout.write(f'{kind}: loaded {len(matrix)} games in {time.perf_counter() - started:.1f}s')
+
+        written = recommendations.build_neighbours(
+            matrix,
+            game_ids,
+            top_k=options['top_k'],
+            block_size=options['block_size'],
+            computed_at=started_at,
+        )
+        refreshed = len(matrix) if game_ids is None else len(game_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'{kind}: stored {written} neighbours for {refreshed} games in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,28 @@
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand
+
+from apps.gamerank_core.caching import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Show the page and fragment cache hit, miss, invalidation and eviction counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Set the counters back to zero after printing them'
+        )
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        stats = get_stats()
+        for kind in ('page', 'fragment'):
+            hits, misses = stats[f'{kind}_hit'], stats[f'{kind}_miss']
+            ratio = f'{hits / (hits + misses):.1%}' if hits + misses else 'n/a'
+            self.stdout.write(f'{kind}: {hits} hits, {misses} misses (hit ratio {ratio})')
+        self.stdout.write(f'invalidations: {stats["invalidations"]}')
+        self.stdout.write(f'backend evictions: {stats.get("backend_evictions", "not reported by this backend")}')
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
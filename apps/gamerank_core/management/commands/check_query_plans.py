@@ -0,0 +1,138 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, QuerySet
+
+from apps.gamerank_core import search
+from apps.gamerank_core.facets import filter_games
+from apps.gamerank_core.models import Comment, Follow, Game, GameStats, Vote
+from apps.gamerank_core.pagination import KeysetPaginator
+from apps.gamerank_core.recommendations import similar_games
+from apps.gamerank_core.trending import trending_games
+from apps.gamerank_core.views import GameListView
+
+# Placeholder keys: EXPLAIN only needs parameters of the right type
+SAMPLE_GAME_ID = 'LIS1-0'
+SAMPLE_USER_ID = 0
+
+
+def _home_page_after_cursor() -> QuerySet:
+    paginator = KeysetPaginator(GameListView().get_queryset(), GameListView.cursor_ordering, 12)
+    values = [3.5, SAMPLE_GAME_ID]
+    return (
+        paginator.queryset.filter(paginator._after(values, paginator.ordering))
+        .order_by(*paginator.ordering)[:13]
+    )
+
+
+def _user_page_after_cursor(model) -> QuerySet:
+    paginator = KeysetPaginator(model.objects.filter(user_id=SAMPLE_USER_ID), ('-created_at', '-id'), 10)
+    values = ['2025-01-01T00:00:00+00:00', 1]
+    return (
+        paginator.queryset.filter(paginator._after(values, paginator.ordering))
+        .order_by(*paginator.ordering)[:11]
+    )
+
+
+# The hot access paths, as the views and services actually build them
+HOT_QUERIES: List[Tuple[str, Callable[[], QuerySet]]] = [
+    ('home page', lambda: GameListView().get_queryset().order_by(*GameListView.cursor_ordering)[:13]),
+    ('home page after cursor', _home_page_after_cursor),
+    ('home page by genre', lambda: (
+        filter_games(GameListView().get_queryset(), {'genre': 'Shooter'})
+        .order_by(*GameListView.cursor_ordering)[:13]
+    )),
+    ('home page by year', lambda: (
+        filter_games(GameListView().get_queryset(), {'year': '2020'})
+        .order_by(*GameListView.cursor_ordering)[:13]
+    )),
+    ('games by release date', lambda: Game.objects.order_by('-release_date')[:12]),
+    ('game comments', lambda: Comment.objects.filter(game_id=SAMPLE_GAME_ID).order_by('-created_at', '-id')[:20]),
+    ('new game comments', lambda: (
+        Comment.objects.filter(game_id=SAMPLE_GAME_ID, id__gt=1).order_by('id')[:50]
+    )),
+    ('comments etag', lambda: GameStats.objects.filter(game_id=SAMPLE_GAME_ID).values_list('comment_count', 'comments_changed_at')),
+    ('players also liked', lambda: similar_games(Game(pk=SAMPLE_GAME_ID))),
+    ('trending this week', lambda: trending_games('week')),
+    ('user votes', lambda: Vote.objects.filter(user_id=SAMPLE_USER_ID).order_by('-created_at', '-id')[:11]),
+    ('user votes after cursor', lambda: _user_page_after_cursor(Vote)),
+    ('user follows', lambda: Follow.objects.filter(user_id=SAMPLE_USER_ID).order_by('-created_at', '-id')[:11]),
+    ('user follows after cursor', lambda: _user_page_after_cursor(Follow)),
+    ('vote score aggregate', lambda: (
+        Vote.objects.filter(game_id__in=[SAMPLE_GAME_ID]).order_by()
+        .values('game_id', 'score').annotate(n=Count('id'))
+    )),
+]
+
+# Filtered listings seek the facet index and sort only the matching games;
+# without a filter-specific rank index that sort is expected. Trending sorts
+# the games it aggregated from the window's buckets.
+SORT_ALLOWED = {'home page by genre', 'home page by year', 'trending this week'}
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot queries and fail if any needs a full table scan or an unexpected temporary sort, '
+        'or if parts of the SQLite search index are missing'
+    )
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Unsupported database backend: {connection.vendor}')
+
+        failures = 0
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Tiny tables make sequential scans and sorts look cheap; disable
+                # them so the plan shows whether a usable index exists at all.
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                    cursor.execute('SET LOCAL enable_sort = off')
+                    cursor.execute('SET LOCAL enable_bitmapscan = off')
+
+            for name, build in HOT_QUERIES:
+                plan = self._explain(build())
+                problems = self._problems(plan, allow_sort=name in SORT_ALLOWED)
+                if problems:
+                    failures += 1
+                    self.stderr.write(self.style.ERROR(f'{name}: {", ".join(problems)}'))
+                    for line in plan:
+                        self.stderr.write(f'    {line}')
+                else:
+                    self.stdout.write(f'{name}: ok')
+                    if options['verbosity'] > 1:
+                        for line in plan:
+                            self.stdout.write(f'    {line}')
+
+        # A table rebuild by a migration silently drops the FTS triggers
+        missing = search.missing_index_parts()
+        if missing:
+            self.stderr.write(self.style.ERROR(f'search index: missing {", ".join(missing)}'))
+        if failures:
+            raise CommandError(f'{failures} of {len(HOT_QUERIES)} hot queries have inefficient plans.')
+        if missing:
+            raise CommandError('The search index is incomplete; run `python manage.py rebuild_search_index`.')
+        self.stdout.write(self.style.SUCCESS(f'All {len(HOT_QUERIES)} hot queries use indexes.'))
+
+    def _explain(self, queryset: QuerySet) -> List[str]:
+        sql, params = queryset.query.sql_with_params()
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def _problems(self, plan: List[str], allow_sort: bool = False) -> List[str]:
+        problems = []
+        for line in plan:
+            if connection.vendor == 'sqlite':
+                if line.startswith('SCAN ') and 'USING' not in line:
+                    problems.append(f'full scan ({line})')
+                if 'USE TEMP B-TREE' in line and not allow_sort:
+                    problems.append(f'temporary sort ({line})')
+            else:
+                if 'Seq Scan' in line:
+                    problems.append(f'full scan ({line.strip()})')
+                if (line.strip().startswith('Sort') or '->  Sort' in line) and not allow_sort:
+                    problems.append(f'sort ({line.strip()})')
+        return problems
@@ -0,0 +1,26 @@
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.gamerank_core import trending
+
+
+class Command(BaseCommand):
+    help = 'Merge old hourly trending activity buckets into daily ones and drop expired buckets'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute the buckets of the last week from the vote, follow and comment tables first',
+        )
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if options['rebuild']:
+            rows = trending.rebuild_activity()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} hourly activity buckets.'))
+            return
+        merged, deleted = trending.compact_activity()
+        self.stdout.write(self.style.SUCCESS(
+            f'Merged {merged} hourly buckets into daily ones and deleted {deleted} expired buckets.'
+        ))
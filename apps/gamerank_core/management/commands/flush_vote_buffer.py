@@ -0,0 +1,49 @@
+import time
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.gamerank_core.votes import flush_vote_buffer
+
+
+class Command(BaseCommand):
+    help = 'Apply votes queued in write-behind mode (ENABLE_VOTE_BUFFER) to the votes and stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Queued votes applied per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, polling the queue every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty in --loop mode (default: 1)'
+        )
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        total = 0
+        try:
+            while True:
+                applied = flush_vote_buffer(batch_size)
+                total += applied
+                if applied and options['verbosity'] > 1:
+                    self.stdout.write(f'Applied {applied} queued votes.')
+                if applied < batch_size:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Applied {total} queued votes.'))
@@ -0,0 +1,13 @@
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand
+
+from apps.gamerank_core.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the platform, genre, source and release year facet counts'
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        rows = rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} facet counts.'))
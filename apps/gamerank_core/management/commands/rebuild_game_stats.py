@@ -0,0 +1,83 @@
+import math
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.gamerank_core.models import Game, GameStats
+from apps.gamerank_core.stats import COUNTER_FIELDS, collect_game_stats, rebuild_game_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the denormalized GameStats counters and rank scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of games processed per batch (default: 1000)'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored counters with the source tables, without writing'
+        )
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        chunk_size = options['chunk_size']
+        verify = options['verify']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        processed = 0
+        mismatched = 0
+        last_id = ''
+
+        # Walk the games by primary key so every batch is an index range scan
+        while True:
+            game_ids = list(
+                Game.all_objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not game_ids:
+                break
+            last_id = game_ids[-1]
+
+            if verify:
+                mismatched += self._verify_chunk(game_ids)
+            else:
+                with transaction.atomic():
+                    rebuild_game_stats(game_ids)
+            processed += len(game_ids)
+
+        if verify:
+            if mismatched:
+                raise CommandError(f'{mismatched} of {processed} games have stale stats.')
+            self.stdout.write(self.style.SUCCESS(f'All {processed} games have consistent stats.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {processed} games.'))
+
+    def _verify_chunk(self, game_ids: list) -> int:
+        """Compare stored stats with freshly computed ones, returning the number of mismatches."""
+        expected = collect_game_stats(game_ids)
+        stored = GameStats.objects.in_bulk(game_ids)
+        mismatched = 0
+        for game_id, fresh in expected.items():
+            current = stored.get(game_id)
+            if current is None:
+                self.stderr.write(self.style.WARNING(f"Game '{game_id}': missing stats row"))
+                mismatched += 1
+                continue
+            diffs = [
+                f'{field}={getattr(current, field)} (expected {getattr(fresh, field)})'
+                for field in COUNTER_FIELDS
+                if getattr(current, field) != getattr(fresh, field)
+            ]
+            if not math.isclose(current.rank_score, fresh.rank_score, abs_tol=1e-9):
+                diffs.append(f'rank_score={current.rank_score} (expected {fresh.rank_score})')
+            if diffs:
+                self.stderr.write(self.style.WARNING(f"Game '{game_id}': {', '.join(diffs)}"))
+                mismatched += 1
+        return mismatched
@@ -0,0 +1,22 @@
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.gamerank_core import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from the game table, recreating its triggers if they are missing'
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if connection.vendor != 'sqlite':
+            # PostgreSQL maintains search_document as a generated column
+            self.stdout.write(f'Nothing to rebuild on {connection.vendor}.')
+            return
+        missing = search.repair_index()
+        if missing:
+            self.stdout.write(f'Recreated missing index parts: {", ".join(missing)}.')
+        else:
+            search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Rebuilt the search index.'))
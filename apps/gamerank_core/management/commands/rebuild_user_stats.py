@@ -0,0 +1,78 @@
+from typing import Any, Dict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.gamerank_core.models import UserStats
+from apps.gamerank_core.stats import USER_COUNTER_FIELDS, collect_user_stats, rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the denormalized UserStats counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of users processed per batch (default: 1000)'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored counters with the source tables, without writing'
+        )
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        chunk_size = options['chunk_size']
+        verify = options['verify']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        processed = 0
+        mismatched = 0
+        last_id = 0
+
+        # Walk the users by primary key so every batch is an index range scan
+        while True:
+            user_ids = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+
+            if verify:
+                mismatched += self._verify_chunk(user_ids)
+            else:
+                with transaction.atomic():
+                    rebuild_user_stats(user_ids)
+            processed += len(user_ids)
+
+        if verify:
+            if mismatched:
+                raise CommandError(f'{mismatched} of {processed} users have stale stats.')
+            self.stdout.write(self.style.SUCCESS(f'All {processed} users have consistent stats.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {processed} users.'))
+
+    def _verify_chunk(self, user_ids: list) -> int:
+        """Compare stored stats with freshly computed ones, returning the number of mismatches."""
+        expected = collect_user_stats(user_ids)
+        stored = UserStats.objects.in_bulk(user_ids)
+        mismatched = 0
+        for user_id, fresh in expected.items():
+            # A missing row is fine for users without any activity
+            current = stored.get(user_id) or UserStats(user_id=user_id)
+            diffs = [
+                f'{field}={getattr(current, field)} (expected {getattr(fresh, field)})'
+                for field in USER_COUNTER_FIELDS
+                if getattr(current, field) != getattr(fresh, field)
+            ]
+            if diffs:
+                self.stderr.write(self.style.WARNING(f"User {user_id}: {', '.join(diffs)}"))
+                mismatched += 1
+        return mismatched
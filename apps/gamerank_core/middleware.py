@@ -0,0 +1,55 @@
+import logging
+from typing import Callable, List
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+
+from .querybudget import QueryBudgetExceeded, get_view_budget
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryRecorder:
+    """Database execute wrapper recording the SQL of every query."""
+
+    def __init__(self) -> None:
+        self.queries: List[str] = []
+        self.view_start = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """Check each view against its declared query budget (development only).
+
+    Set ``QUERY_BUDGET_MODE`` to ``'raise'`` to turn overruns into errors,
+    otherwise they are logged as warnings.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        recorder = _QueryRecorder()
+        request._query_recorder = recorder
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        budget = getattr(request, '_query_budget', None)
+        view_queries = recorder.queries[recorder.view_start:]
+        if budget is not None and len(view_queries) > budget:
+            error = QueryBudgetExceeded(f'View for {request.path}', budget, view_queries)
+            if getattr(settings, 'QUERY_BUDGET_MODE', 'log') == 'raise':
+                raise error
+            logger.warning(str(error))
+        return response
+
+    def process_view(self, request: HttpRequest, view_func: Callable, view_args: tuple, view_kwargs: dict) -> None:
+        recorder = getattr(request, '_query_recorder', None)
+        if recorder is not None:
+            recorder.view_start = len(recorder.queries)
+            request._query_budget = get_view_budget(view_func)
+        return None
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameStats',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='gamerank_core.game')),
+                ('vote_sum', models.IntegerField(default=0)),
+                ('vote_count', models.IntegerField(default=0)),
+                ('votes_0', models.IntegerField(default=0)),
+                ('votes_1', models.IntegerField(default=0)),
+                ('votes_2', models.IntegerField(default=0)),
+                ('votes_3', models.IntegerField(default=0)),
+                ('votes_4', models.IntegerField(default=0)),
+                ('votes_5', models.IntegerField(default=0)),
+                ('follower_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'game stats',
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0002_gamestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamestats',
+            name='rank_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddIndex(
+            model_name='gamestats',
+            index=models.Index(fields=['-rank_score', 'game'], name='gamestats_rank_idx'),
+        ),
+    ]
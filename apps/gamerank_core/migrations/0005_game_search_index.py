@@ -0,0 +1,43 @@
+# Full-text search index, see apps/gamerank_core/search.py
+
+from django.db import DatabaseError, migrations, transaction
+
+from apps.gamerank_core import search
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for statement in search.SQLITE_SETUP:
+            schema_editor.execute(statement)
+    elif connection.vendor == 'postgresql':
+        for statement in search.POSTGRES_SETUP:
+            schema_editor.execute(statement)
+        try:
+            # pg_trgm powers typo tolerance but needs privileges to install
+            with transaction.atomic(using=connection.alias):
+                for statement in search.POSTGRES_TRIGRAM_SETUP:
+                    schema_editor.execute(statement)
+        except DatabaseError:
+            pass
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for statement in search.SQLITE_TEARDOWN:
+            schema_editor.execute(statement)
+    elif connection.vendor == 'postgresql':
+        for statement in search.POSTGRES_TEARDOWN:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
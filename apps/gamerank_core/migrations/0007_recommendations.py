@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0006_facet_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarGame',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('votes', 'Players also liked')], max_length=10)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='gamestats',
+            name='votes_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='gamestats',
+            index=models.Index(fields=['votes_changed_at'], name='gamestats_votes_changed_idx'),
+        ),
+        migrations.AddField(
+            model_name='similargame',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_games', to='gamerank_core.game'),
+        ),
+        migrations.AddField(
+            model_name='similargame',
+            name='similar',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='gamerank_core.game'),
+        ),
+        migrations.AddIndex(
+            model_name='similargame',
+            index=models.Index(fields=['game', 'kind', '-score'], name='similargame_top_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='similargame',
+            unique_together={('game', 'kind', 'similar')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0007_recommendations'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='similargame',
+            name='kind',
+            field=models.CharField(choices=[('votes', 'Players also liked'), ('content', 'Similar games')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0010_pendingvote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameActivityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.IntegerField()),
+                ('span_hours', models.SmallIntegerField(default=1)),
+                ('votes', models.IntegerField(default=0)),
+                ('follows', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='gamerank_core.game')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='activity_hour_idx')],
+                'unique_together': {('game', 'hour', 'span_hours')},
+            },
+        ),
+    ]
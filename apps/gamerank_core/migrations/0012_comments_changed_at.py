@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0011_activity_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamestats',
+            name='comments_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0012_comments_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamestats',
+            name='version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+from apps.gamerank_core import search
+
+
+def restore_search_index(apps, schema_editor):
+    # Adding or removing a column makes SQLite rebuild the game table, which
+    # drops the full-text triggers and renumbers the rowids the index refers
+    # to. SQLITE_SETUP recreates the triggers and ends with a full rebuild.
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in search.SQLITE_SETUP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_core', '0015_userstats_version'),
+    ]
+
+    operations = [
+        # Runs last when unapplying, after the fields are removed again
+        migrations.RunPython(migrations.RunPython.noop, restore_search_index),
+        migrations.AddField(
+            model_name='game',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='removed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,23 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models import Avg, Count
+from django.db.models import Count
 from django.utils import timezone
 from typing import Optional
 
 
+class ActiveGameManager(models.Manager):
+    """Games that have not been removed from their source feed."""
+
+    def get_queryset(self) -> models.QuerySet:
+        return super().get_queryset().filter(removed_at__isnull=True)
+
+
 class Game(models.Model):
-    """Model representing a video game."""
+    """Model representing a video game.
+
+    ``Game.objects`` leaves out games removed from their feed (``removed_at``
+    set by an import with ``--prune``); ``Game.all_objects`` includes them.
+    """
     id = models.CharField(max_length=50, primary_key=True)
     title = models.CharField(max_length=200)
     platform = models.CharField(max_length=100)
@@ -19,33 +30,173 @@ class Game(models.Model):
     source = models.CharField(max_length=50)  # e.g., 'LIS1', 'FTG', 'MMO'
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Fingerprint of the imported fields, so unchanged rows are not rewritten (see gamerank_ingestion.upsert)
+    content_hash = models.CharField(max_length=32, blank=True, default='', editable=False)
+    removed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveGameManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-release_date']
+        indexes = [
+            models.Index(fields=['-release_date'], name='game_release_date_idx'),
+            # Facet filters on the home page
+            models.Index(fields=['platform'], name='game_platform_idx'),
+            models.Index(fields=['genre'], name='game_genre_idx'),
+            models.Index(fields=['source'], name='game_source_idx'),
+            # Incremental exports (see exports.py)
+            models.Index(fields=['updated_at', 'id'], name='game_updated_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} ({self.platform})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored facet values so a later save can update FacetCount by delta."""
+        instance = super().from_db(db, field_names, values)
+        from .facets import game_facets
+        instance._loaded_facets = game_facets(instance)
+        return instance
+
+    @property
+    def game_stats(self) -> 'GameStats':
+        """Get the denormalized stats row, computing it on the fly if it is missing."""
+        try:
+            return self.stats
+        except GameStats.DoesNotExist:
+            from .stats import collect_game_stats
+            return collect_game_stats([self.pk])[self.pk]
+
     @property
     def average_score(self) -> float:
-        """Calculate the average score for this game."""
-        result = self.votes.aggregate(avg=Avg('score'))
-        return result['avg'] or 0.0
+        """Get the average score for this game."""
+        return self.game_stats.average_score
 
     @property
     def votes_count(self) -> int:
         """Get the total number of votes for this game."""
-        return self.votes.count()
+        return self.game_stats.vote_count
 
     @property
     def followers_count(self) -> int:
         """Get the total number of followers for this game."""
-        return self.follows.count()
+        return self.game_stats.follower_count
 
     @property
     def comments_count(self) -> int:
         """Get the total number of comments for this game."""
-        return self.comments.count()
+        return self.game_stats.comment_count
+
+
+class GameStats(models.Model):
+    """Denormalized per-game counters, kept in sync on every vote, follow and comment write."""
+    game = models.OneToOneField(Game, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    vote_sum = models.IntegerField(default=0)
+    vote_count = models.IntegerField(default=0)
+    votes_0 = models.IntegerField(default=0)
+    votes_1 = models.IntegerField(default=0)
+    votes_2 = models.IntegerField(default=0)
+    votes_3 = models.IntegerField(default=0)
+    votes_4 = models.IntegerField(default=0)
+    votes_5 = models.IntegerField(default=0)
+    follower_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    rank_score = models.FloatField(default=0.0)  # see ranking.py
+    # Last vote write, so build_recommendations can refresh only changed games
+    votes_changed_at = models.DateTimeField(null=True, blank=True)
+    # Last comment write, part of the comments fragment's ETag
+    comments_changed_at = models.DateTimeField(null=True, blank=True)
+    # Bumped on every write to the game or its counters; keys the cached detail page (see detail.py)
+    version = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'game stats'
+        indexes = [
+            # Leaderboard order: the home page reads this index front to back
+            models.Index(fields=['-rank_score', 'game'], name='gamestats_rank_idx'),
+            models.Index(fields=['votes_changed_at'], name='gamestats_votes_changed_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Stats for {self.game_id}"
+
+    @property
+    def average_score(self) -> float:
+        """Calculate the average score from the running sum and count."""
+        if not self.vote_count:
+            return 0.0
+        return self.vote_sum / self.vote_count
+
+    @property
+    def histogram(self) -> list[int]:
+        """Get the number of votes for each score from 0 to 5."""
+        return [getattr(self, f'votes_{score}') for score in range(6)]
+
+
+class GameActivityBucket(models.Model):
+    """Votes, follows and comments on a game within one time bucket (see trending.py).
+
+    Buckets start as one hour long and are merged into one-day buckets by
+    compact_activity once they are older than the hourly retention.
+    """
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='activity')
+    hour = models.IntegerField()  # bucket start, in hours since the Unix epoch
+    span_hours = models.SmallIntegerField(default=1)
+    votes = models.IntegerField(default=0)
+    follows = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['game', 'hour', 'span_hours']
+        indexes = [
+            # Trending windows read a recent range of buckets
+            models.Index(fields=['hour'], name='activity_hour_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Activity for {self.game_id} at hour {self.hour} ({self.span_hours}h)"
+
+
+class SimilarGame(models.Model):
+    """A precomputed nearest neighbour of a game, written by the batch similarity jobs."""
+    KIND_VOTES = 'votes'
+    KIND_CONTENT = 'content'
+    KIND_CHOICES = [
+        (KIND_VOTES, 'Players also liked'),
+        (KIND_CONTENT, 'Similar games'),
+    ]
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='similar_games')
+    similar = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='neighbour_of')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['game', 'kind', 'similar']
+        indexes = [
+            # Top-K neighbours of one game, already in score order
+            models.Index(fields=['game', 'kind', '-score'], name='similargame_top_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.game_id} -> {self.similar_id} ({self.kind}, {self.score:.3f})"
+
+
+class FacetCount(models.Model):
+    """Number of games for each facet value (platform, genre, source, release year)."""
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=200)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['facet', 'value']
+        ordering = ['facet', '-count']
+
+    def __str__(self) -> str:
+        return f"{self.facet}={self.value} ({self.count})"
 
 
 class Vote(models.Model):
@@ -54,14 +205,51 @@ class Vote(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='votes')
     score = models.IntegerField(choices=[(i, i) for i in range(6)])  # 0-5
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['user', 'game']
         ordering = ['-created_at']
+        indexes = [
+            # "My votes", newest first (keyset pagination on created_at, id)
+            models.Index(fields=['user', '-created_at', '-id'], name='vote_user_created_idx'),
+            # Per-game score aggregates read only the index
+            models.Index(fields=['game', 'score'], name='vote_game_score_idx'),
+            # Incremental exports (see exports.py)
+            models.Index(fields=['updated_at', 'id'], name='vote_updated_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.username} voted {self.score} for {self.game.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored score so a later save can update stats by delta."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+
+class PendingVote(models.Model):
+    """A vote accepted in write-behind mode and not yet applied (see votes.flush_vote_buffer).
+
+    Rows are only ever inserted and deleted; repeated votes by the same user
+    on the same game are coalesced when flushed, keeping the latest score.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_votes')
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='pending_votes')
+    score = models.IntegerField(choices=[(i, i) for i in range(6)])  # 0-5
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # A user's latest pending vote on a game, read to show it before the flush
+            models.Index(fields=['user', 'game', '-id'], name='pendingvote_user_game_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Pending vote {self.score} by {self.user_id} for {self.game_id}"
+
 
 class Follow(models.Model):
     """Model representing a user following a game."""
@@ -72,6 +260,9 @@ class Follow(models.Model):
     class Meta:
         unique_together = ['user', 'game']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='follow_user_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.username} follows {self.game.title}"
@@ -87,31 +278,65 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Comments of a game, newest first
+            models.Index(fields=['game', '-created_at', '-id'], name='comment_game_created_idx'),
+            # Incremental exports (see exports.py)
+            models.Index(fields=['updated_at', 'id'], name='comment_updated_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"Comment by {self.user.username} on {self.game.title}"
 
 
-# Add properties to User model
+class UserStats(models.Model):
+    """Denormalized per-user counters, kept in sync on every vote, follow and comment write."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    vote_count = models.IntegerField(default=0)
+    vote_sum = models.IntegerField(default=0)
+    follow_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    # Bumped on every vote, follow and comment write of the user; part of the user pages' ETags
+    version = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'user stats'
+
+    def __str__(self) -> str:
+        return f"Stats for {self.user_id}"
+
+    @property
+    def average_score(self) -> float:
+        """Calculate the average score given from the running sum and count."""
+        if not self.vote_count:
+            return 0.0
+        return self.vote_sum / self.vote_count
+
+
+# Add properties to User model. They read the UserStats row, joined with
+# select_related('stats') for listings or from the per-user cache otherwise.
 def get_user_votes_count(self) -> int:
     """Get the total number of votes by this user."""
-    return self.votes.count()
+    from .stats import get_user_stats
+    return get_user_stats(self).vote_count
 
 
 def get_user_average_score(self) -> float:
     """Calculate the average score given by this user."""
-    result = self.votes.aggregate(avg=Avg('score'))
-    return result['avg'] or 0.0
+    from .stats import get_user_stats
+    return get_user_stats(self).average_score
 
 
 def get_user_follows_count(self) -> int:
     """Get the total number of games followed by this user."""
-    return self.follows.count()
+    from .stats import get_user_stats
+    return get_user_stats(self).follow_count
 
 
 def get_user_comments_count(self) -> int:
     """Get the total number of comments by this user."""
-    return self.comments.count()
+    from .stats import get_user_stats
+    return get_user_stats(self).comment_count
 
 
 # Add properties to User model
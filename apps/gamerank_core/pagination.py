@@ -0,0 +1,192 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of ``OFFSET n`` the next page is selected with a range condition on
+the ordering columns of the last row seen, e.g. for ``('-created_at', '-id')``::
+
+    WHERE created_at <= :c AND (created_at < :c OR (created_at = :c AND id < :i))
+    ORDER BY created_at DESC, id DESC LIMIT per_page + 1
+
+so with an index on the ordering columns every page costs the same as the
+first one. Cursors are signed, opaque tokens; the total count is optional
+and cached, so rendering a page never needs a ``COUNT(*)``.
+"""
+import datetime
+import hashlib
+from typing import Any, List, Optional, Sequence
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q, QuerySet
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'gamerank.pagination.cursor'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage:
+    """A page of results with opaque cursors to its neighbours."""
+
+    def __init__(
+        self,
+        object_list: List[Any],
+        paginator: 'KeysetPaginator',
+        has_next: bool,
+        has_previous: bool,
+    ) -> None:
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def next_cursor(self) -> Optional[str]:
+        if not (self._has_next and self.object_list):
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @cached_property
+    def previous_cursor(self) -> Optional[str]:
+        if not (self._has_previous and self.object_list):
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'prev')
+
+
+class KeysetPaginator:
+    """Paginate a queryset by a unique, non-null ordering such as ('-created_at', '-id')."""
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        ordering: Sequence[str],
+        per_page: int,
+        count_cache_timeout: int = 60,
+    ) -> None:
+        if not ordering:
+            raise ValueError('Keyset pagination needs at least one ordering field.')
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.count_cache_timeout = count_cache_timeout
+
+    @cached_property
+    def count(self) -> int:
+        """Total number of rows, cached so only the first reader pays for the COUNT."""
+        sql_hash = hashlib.md5(str(self.queryset.query).encode()).hexdigest()
+        key = f'gamerank:pagination:count:{sql_hash}'
+        return cache.get_or_set(key, self.queryset.count, self.count_cache_timeout)
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        """Get the page after (or before) the given cursor, or the first page."""
+        if not cursor:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, False)
+
+        values, direction = self.decode_cursor(cursor)
+        if direction == 'next':
+            rows = list(
+                self.queryset.filter(self._after(values, self.ordering))
+                .order_by(*self.ordering)[:self.per_page + 1]
+            )
+            return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, True)
+
+        reverse_ordering = [self._flip(field) for field in self.ordering]
+        rows = list(
+            self.queryset.filter(self._after(values, reverse_ordering))
+            .order_by(*reverse_ordering)[:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        return KeysetPage(rows[:self.per_page][::-1], self, True, has_previous)
+
+    def encode_cursor(self, obj: Any, direction: str) -> str:
+        values = [self._serialize(self._value(obj, field.lstrip('-'))) for field in self.ordering]
+        return signing.dumps({'k': values, 'd': direction}, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor: str) -> tuple[List[Any], str]:
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            values, direction = data['k'], data['d']
+        except (signing.BadSignature, KeyError, TypeError) as exc:
+            raise InvalidCursor(str(exc)) from exc
+        if direction not in ('next', 'prev') or len(values) != len(self.ordering):
+            raise InvalidCursor('Cursor does not match this listing.')
+        return [self._deserialize(value) for value in values], direction
+
+    @staticmethod
+    def _after(values: List[Any], ordering: List[str]) -> Q:
+        """Build the lexicographic "comes after values" condition for the ordering."""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clause = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_field, prev_value in zip(ordering[:i], values[:i]):
+                clause &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= clause
+        # Redundant bound on the leading column so the planner can seek the
+        # index instead of scanning it from the start and filtering.
+        first = ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+    @staticmethod
+    def _flip(field: str) -> str:
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _value(obj: Any, path: str) -> Any:
+        for attr in path.split('__'):
+            obj = getattr(obj, attr)
+        return obj
+
+    @staticmethod
+    def _serialize(value: Any) -> Any:
+        if isinstance(value, datetime.datetime):
+            return {'dt': value.isoformat()}
+        return value
+
+    @staticmethod
+    def _deserialize(value: Any) -> Any:
+        if isinstance(value, dict) and 'dt' in value:
+            return parse_datetime(value['dt'])
+        return value
+
+
+class KeysetPaginationMixin:
+    """ListView mixin replacing offset pagination with keyset pagination."""
+    cursor_ordering: Sequence[str] = ()
+    cursor_kwarg = 'cursor'
+    count_cache_timeout = 60
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(
+            queryset,
+            self.cursor_ordering,
+            page_size,
+            count_cache_timeout=self.count_cache_timeout,
+        )
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('Invalid page cursor.')
+        return (paginator, page, page.object_list, page.has_other_pages())
@@ -0,0 +1,56 @@
+"""
+Query budgets: declare how many SQL queries a view (or any block of code)
+may run, and fail or log when it runs more.
+
+In tests::
+
+    with query_budget(3):
+        client.get(url)
+
+On views, set ``query_budget = n`` on the class or decorate a function view
+with ``@with_query_budget(n)``; ``QueryBudgetMiddleware`` then checks every
+request while ``DEBUG`` is on. Queries run by middleware before the view
+(session and auth lookups) are not counted.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block of code runs more queries than its budget allows."""
+
+    def __init__(self, label: str, budget: int, queries: List[str]) -> None:
+        self.budget = budget
+        self.queries = queries
+        listing = '\n'.join(f'{i}. {sql}' for i, sql in enumerate(queries, start=1))
+        super().__init__(
+            f'{label} ran {len(queries)} queries, budget is {budget}:\n{listing}'
+        )
+
+
+@contextmanager
+def query_budget(budget: int, using: str = DEFAULT_DB_ALIAS, label: str = 'Block') -> Iterator[CaptureQueriesContext]:
+    """Raise QueryBudgetExceeded if the block runs more than budget queries."""
+    with CaptureQueriesContext(connections[using]) as captured:
+        yield captured
+    if len(captured) > budget:
+        raise QueryBudgetExceeded(label, budget, [query['sql'] for query in captured.captured_queries])
+
+
+def with_query_budget(budget: int) -> Callable[[Callable], Callable]:
+    """Declare the query budget of a function-based view."""
+    def decorator(view_func: Callable) -> Callable:
+        view_func.query_budget = budget
+        return view_func
+    return decorator
+
+
+def get_view_budget(view_func: Callable) -> Optional[int]:
+    """Find the budget declared on a view function or its class-based view."""
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'view_class', None), 'query_budget', None)
+    return budget
@@ -0,0 +1,58 @@
+"""
+Rank score used to order the home leaderboard.
+
+The score is stored in the indexed ``GameStats.rank_score`` column and is
+recomputed in the same UPDATE that changes the vote counters, so reading
+the leaderboard never aggregates the Vote table.
+
+Two methods are available through ``settings.GAMERANK_RANKING``:
+
+* ``mean``: the plain average score (0 for games without votes).
+* ``bayesian``: the average shrunk towards ``PRIOR_MEAN`` as if every game
+  had ``PRIOR_WEIGHT`` extra votes at that score, so a single 5-star vote
+  does not top the chart.
+
+Changing these settings requires ``python manage.py rebuild_game_stats``.
+"""
+from typing import Any, Dict
+
+from django.conf import settings
+from django.db.models import Expression, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+DEFAULT_RANKING: Dict[str, Any] = {
+    'METHOD': 'bayesian',
+    'PRIOR_MEAN': 2.5,
+    'PRIOR_WEIGHT': 5,
+}
+
+
+def get_ranking_config() -> Dict[str, Any]:
+    """Get the ranking configuration merged over the defaults."""
+    config = {**DEFAULT_RANKING, **getattr(settings, 'GAMERANK_RANKING', {})}
+    if config['METHOD'] not in ('mean', 'bayesian'):
+        raise ValueError(f"Unknown ranking method: {config['METHOD']!r}")
+    return config
+
+
+def rank_value(vote_sum: int, vote_count: int) -> float:
+    """Compute the rank score in Python."""
+    config = get_ranking_config()
+    if config['METHOD'] == 'bayesian' and config['PRIOR_WEIGHT'] > 0:
+        weight = config['PRIOR_WEIGHT']
+        return (weight * config['PRIOR_MEAN'] + vote_sum) / (weight + vote_count)
+    if not vote_count:
+        return 0.0
+    return vote_sum / vote_count
+
+
+def rank_expression(vote_sum: Expression, vote_count: Expression) -> Expression:
+    """Build the SQL expression matching rank_value, for use in UPDATE statements."""
+    config = get_ranking_config()
+    total = Cast(vote_sum, FloatField())
+    if config['METHOD'] == 'bayesian' and config['PRIOR_WEIGHT'] > 0:
+        weight = config['PRIOR_WEIGHT']
+        return (Value(float(weight * config['PRIOR_MEAN'])) + total) / (
+            Value(float(weight)) + vote_count
+        )
+    return Coalesce(total / NullIf(vote_count, 0), Value(0.0), output_field=FloatField())
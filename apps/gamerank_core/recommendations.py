@@ -0,0 +1,372 @@
+"""
+Precomputed "similar games", from votes and from game content.
+
+Two batch-built neighbour sets are stored in ``SimilarGame``:
+
+* ``votes``: item-item collaborative filtering. Votes are loaded into a
+  sparse games x users matrix and centred on each voter's mean score
+  (adjusted cosine). Similarities are shrunk towards zero when few players
+  voted on both games (``sim * n / (n + shrinkage)``) and dropped below
+  ``min_common`` co-voters.
+* ``content``: cosine similarity of genre, platform, developer and
+  publisher indicators plus TF-IDF of the description, so games without
+  any votes (fresh imports) still get neighbours.
+
+Both are computed a block of games at a time, so memory stays at the size
+of the sparse matrix plus one ``block x games`` dense block. The request
+path only reads the stored top-K back through ``similargame_top_idx``.
+
+NumPy and SciPy are only needed by the batch jobs, not by the web views.
+"""
+import math
+from array import array
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet, Sum
+from django.utils import timezone
+
+from .models import Game, GameStats, SimilarGame, Vote
+from .search import TOKEN_RE
+
+# Votes at or above this score count as "liked" when recommending to a user
+LIKED_SCORE = 4
+# Memory for the dense similarity blocks when no block size is given
+BLOCK_MEMORY_BYTES = 64 * 1024 * 1024
+
+# Relative weight of each content feature in the content similarity
+CONTENT_WEIGHTS = {
+    'genre': 1.0,
+    'platform': 0.3,
+    'developer': 0.6,
+    'publisher': 0.3,
+    'description': 1.0,
+}
+# Description terms in more than this share of games carry no signal
+MAX_DOCUMENT_FREQUENCY = 0.5
+MIN_CONTENT_SCORE = 0.05
+
+
+def similar_games(game: Game, kind: str = SimilarGame.KIND_VOTES, limit: int = 6) -> QuerySet:
+    """Get the stored neighbours of a game, best first, with their stats."""
+    return (
+        SimilarGame.objects.filter(game=game, kind=kind, similar__removed_at__isnull=True)
+        .select_related('similar__stats')
+        .order_by('-score')[:limit]
+    )
+
+
+def recommended_for(user: User, limit: int = 6) -> QuerySet:
+    """Recommend games similar to the ones a user liked recently and has not voted on, in one query."""
+    liked = (
+        Vote.objects.filter(user=user, score__gte=LIKED_SCORE)
+        .order_by('-created_at')
+        .values('game_id')[:20]
+    )
+    return (
+        Game.objects.filter(
+            neighbour_of__kind=SimilarGame.KIND_VOTES,
+            neighbour_of__game_id__in=liked,
+        )
+        .exclude(pk__in=Vote.objects.filter(user=user).values('game_id'))
+        .select_related('stats')
+        .annotate(recommendation_score=Sum('neighbour_of__score'))
+        .order_by('-recommendation_score', 'pk')[:limit]
+    )
+
+
+def _require_numpy() -> Tuple[Any, Any]:
+    try:
+        import numpy
+        from scipy import sparse
+    except ImportError as exc:
+        raise ImportError(
+            'Building similar games needs numpy and scipy (pip install -r requirements.txt).'
+        ) from exc
+    return numpy, sparse
+
+
+def _normalize_rows(matrix: Any) -> Any:
+    """Scale every row of a sparse matrix to unit length (empty rows stay empty)."""
+    np, sparse = _require_numpy()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(matrix).tocsr().astype(np.float32)
+
+
+def _top_k(similarity: Any, targets: Any, top_k: int) -> Iterator[Tuple[int, List[Tuple[int, float]]]]:
+    """Pick the best positive scores per row of a dense block x games similarity block."""
+    np, _ = _require_numpy()
+    similarity[np.arange(len(targets)), targets] = 0.0
+    k = min(top_k, similarity.shape[1] - 1)
+    if k <= 0:
+        for target in targets:
+            yield int(target), []
+        return
+    best = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    for row, target in enumerate(targets):
+        candidates = best[row]
+        scores = similarity[row, candidates]
+        order = np.argsort(-scores, kind='stable')
+        yield int(target), [
+            (int(candidates[i]), float(scores[i])) for i in order if scores[i] > 0
+        ]
+
+
+class VoteMatrix:
+    """Votes as a row-normalized, user-mean-centred sparse games x users matrix."""
+    kind = SimilarGame.KIND_VOTES
+
+    def __init__(
+        self,
+        votes: Iterable[Tuple[int, str, int]],
+        min_common: int = 3,
+        shrinkage: float = 10.0,
+    ) -> None:
+        np, sparse = _require_numpy()
+        self.min_common = min_common
+        self.shrinkage = shrinkage
+
+        users: Dict[int, int] = {}
+        games: Dict[str, int] = {}
+        rows, cols, scores = array('i'), array('i'), array('f')
+        for user_id, game_id, score in votes:
+            rows.append(games.setdefault(game_id, len(games)))
+            cols.append(users.setdefault(user_id, len(users)))
+            scores.append(score)
+
+        self.game_ids: List[str] = list(games)
+        self.index: Dict[str, int] = games
+        shape = (len(games), len(users))
+        rows_np = np.frombuffer(rows, dtype=np.int32)
+        cols_np = np.frombuffer(cols, dtype=np.int32)
+        data = np.frombuffer(scores, dtype=np.float32).copy()
+
+        # Adjusted cosine: remove each user's rating bias
+        user_totals = np.bincount(cols_np, weights=data, minlength=shape[1])
+        user_counts = np.maximum(np.bincount(cols_np, minlength=shape[1]), 1)
+        data -= (user_totals / user_counts)[cols_np].astype(np.float32)
+
+        centred = sparse.csr_matrix((data, (rows_np, cols_np)), shape=shape, dtype=np.float32)
+        self.normalized = _normalize_rows(centred)
+        self.voted = sparse.csr_matrix(
+            (np.ones(len(data), dtype=np.float32), (rows_np, cols_np)), shape=shape
+        )
+        self._normalized_t = self.normalized.T.tocsr()
+        self._voted_t = self.voted.T.tocsr()
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def top_neighbours(self, targets: Sequence[int], top_k: int) -> Iterator[Tuple[int, List[Tuple[int, float]]]]:
+        """Yield (game index, [(neighbour index, score), ...]) for a block of target games."""
+        np, _ = _require_numpy()
+        targets = np.asarray(targets, dtype=np.int64)
+        similarity = (self.normalized[targets] @ self._normalized_t).toarray()
+        common = (self.voted[targets] @ self._voted_t).toarray()
+
+        similarity *= common / np.maximum(common + self.shrinkage, 1e-9)
+        similarity[common < self.min_common] = 0.0
+        return _top_k(similarity, targets, top_k)
+
+
+class ContentMatrix:
+    """Games as row-normalized vectors of weighted metadata indicators and description TF-IDF."""
+    kind = SimilarGame.KIND_CONTENT
+
+    def __init__(self, games: Iterable[Tuple[str, str, str, str, str, str]]) -> None:
+        _, sparse = _require_numpy()
+        games = list(games)
+        self.game_ids: List[str] = [game[0] for game in games]
+        self.index: Dict[str, int] = {game_id: i for i, game_id in enumerate(self.game_ids)}
+
+        blocks = []
+        for position, field in enumerate(['genre', 'platform', 'developer', 'publisher'], start=1):
+            # Multi-valued fields such as "PC (Windows), Web Browser" become several indicators
+            values = [
+                [value.strip().lower() for value in (game[position] or '').split(',') if value.strip()]
+                for game in games
+            ]
+            blocks.append(self._weighted(self._indicators(values), CONTENT_WEIGHTS[field]))
+        descriptions = [TOKEN_RE.findall((game[5] or '').lower()) for game in games]
+        blocks.append(self._weighted(self._tfidf(descriptions), CONTENT_WEIGHTS['description']))
+
+        self.normalized = _normalize_rows(sparse.hstack(blocks, format='csr'))
+        self._normalized_t = self.normalized.T.tocsr()
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def top_neighbours(self, targets: Sequence[int], top_k: int) -> Iterator[Tuple[int, List[Tuple[int, float]]]]:
+        """Yield (game index, [(neighbour index, score), ...]) for a block of target games."""
+        np, _ = _require_numpy()
+        targets = np.asarray(targets, dtype=np.int64)
+        similarity = (self.normalized[targets] @ self._normalized_t).toarray()
+        similarity[similarity < MIN_CONTENT_SCORE] = 0.0
+        return _top_k(similarity, targets, top_k)
+
+    @staticmethod
+    def _weighted(matrix: Any, weight: float) -> Any:
+        # After row normalization every block contributes weight to the cosine
+        return _normalize_rows(matrix) * math.sqrt(weight)
+
+    @staticmethod
+    def _indicators(values: List[List[str]]) -> Any:
+        np, sparse = _require_numpy()
+        vocabulary: Dict[str, int] = {}
+        rows, cols = array('i'), array('i')
+        for row, row_values in enumerate(values):
+            for value in set(row_values):
+                rows.append(row)
+                cols.append(vocabulary.setdefault(value, len(vocabulary)))
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32))),
+            shape=(len(values), max(len(vocabulary), 1)),
+        )
+
+    @staticmethod
+    def _tfidf(documents: List[List[str]]) -> Any:
+        np, sparse = _require_numpy()
+        document_frequency = Counter(term for terms in documents for term in set(terms))
+        max_frequency = max(2, MAX_DOCUMENT_FREQUENCY * len(documents))
+        # Terms in a single game cannot make two games similar
+        vocabulary = {
+            term: i for i, term in enumerate(
+                term for term, n in document_frequency.items() if 1 < n <= max_frequency
+            )
+        }
+        rows, cols, weights = array('i'), array('i'), array('f')
+        for row, terms in enumerate(documents):
+            for term, count in Counter(terms).items():
+                column = vocabulary.get(term)
+                if column is not None:
+                    rows.append(row)
+                    cols.append(column)
+                    # Sublinear term frequency times smoothed inverse document frequency
+                    weights.append(
+                        (1 + math.log(count)) * math.log((1 + len(documents)) / (1 + document_frequency[term]))
+                    )
+        return sparse.csr_matrix(
+            (
+                np.frombuffer(weights, dtype=np.float32),
+                (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32)),
+            ),
+            shape=(len(documents), max(len(vocabulary), 1)),
+        )
+
+
+def load_vote_matrix(min_common: int = 3, shrinkage: float = 10.0, chunk_size: int = 20_000) -> VoteMatrix:
+    """Stream every vote from the database into a VoteMatrix."""
+    votes = Vote.objects.order_by().values_list('user_id', 'game_id', 'score')
+    return VoteMatrix(votes.iterator(chunk_size=chunk_size), min_common=min_common, shrinkage=shrinkage)
+
+
+def load_content_matrix(chunk_size: int = 5_000) -> ContentMatrix:
+    """Stream every game's content fields from the database into a ContentMatrix."""
+    games = Game.objects.order_by().values_list(
+        'id', 'genre', 'platform', 'developer', 'publisher', 'description'
+    )
+    return ContentMatrix(games.iterator(chunk_size=chunk_size))
+
+
+def changed_game_ids(kind: str, since: datetime) -> List[str]:
+    """Get the games whose votes (or content) changed at or after since."""
+    if kind == SimilarGame.KIND_CONTENT:
+        changed = Game.objects.filter(updated_at__gte=since).values_list('id', flat=True)
+    else:
+        changed = GameStats.objects.filter(votes_changed_at__gte=since).values_list('game_id', flat=True)
+    return list(changed)
+
+
+def last_build_time(kind: str) -> Optional[datetime]:
+    """Get when neighbours of this kind were last computed, if ever."""
+    return (
+        SimilarGame.objects.filter(kind=kind)
+        .order_by('-computed_at')
+        .values_list('computed_at', flat=True)
+        .first()
+    )
+
+
+def build_neighbours(
+    matrix: Any,
+    game_ids: Optional[Iterable[str]] = None,
+    top_k: int = 20,
+    block_size: Optional[int] = None,
+    computed_at: Optional[datetime] = None,
+) -> int:
+    """Compute and store the top-K neighbours of the given games (default: every game in the matrix).
+
+    Each block is replaced in its own transaction, so readers see either the
+    old or the new neighbours of a game. Returns the number of rows written.
+    """
+    computed_at = computed_at or timezone.now()
+    kind = matrix.kind
+    if not block_size:
+        # At most two float32 block x games arrays (similarity and co-voter counts)
+        block_size = max(16, BLOCK_MEMORY_BYTES // (8 * max(len(matrix), 1)))
+    if game_ids is None:
+        targets = list(range(len(matrix)))
+        stale = []
+    else:
+        game_ids = list(game_ids)
+        targets = [matrix.index[game_id] for game_id in game_ids if game_id in matrix.index]
+        # Games that lost all their votes (or were deleted) keep no neighbours
+        stale = [game_id for game_id in game_ids if game_id not in matrix.index]
+
+    written = 0
+    if stale:
+        SimilarGame.objects.filter(kind=kind, game_id__in=stale).delete()
+    for start in range(0, len(targets), block_size):
+        block = targets[start:start + block_size]
+        rows = [
+            SimilarGame(
+                game_id=matrix.game_ids[target],
+                similar_id=matrix.game_ids[neighbour],
+                kind=kind,
+                score=score,
+                computed_at=computed_at,
+            )
+            for target, neighbours in matrix.top_neighbours(block, top_k)
+            for neighbour, score in neighbours
+        ]
+        with transaction.atomic():
+            SimilarGame.objects.filter(
+                kind=kind,
+                game_id__in=[matrix.game_ids[target] for target in block],
+            ).delete()
+            SimilarGame.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+    if game_ids is None:
+        # Full rebuild: drop games that are no longer in the matrix
+        SimilarGame.objects.filter(kind=kind, computed_at__lt=computed_at).delete()
+    return written
+
+
+def refresh_content_neighbours(game_ids: Iterable[str], top_k: int = 20) -> int:
+    """Recompute content neighbours after games were created or edited.
+
+    Besides the touched games, the games that listed them before and the
+    games they are now similar to are refreshed, so new titles also show up
+    on their neighbours' pages. Returns the number of rows written.
+    """
+    game_ids = set(game_ids)
+    if not game_ids:
+        return 0
+    computed_at = timezone.now()
+    matrix = load_content_matrix()
+    previous = set(
+        SimilarGame.objects.filter(kind=SimilarGame.KIND_CONTENT, similar_id__in=game_ids)
+        .values_list('game_id', flat=True)
+    )
+    written = build_neighbours(matrix, sorted(game_ids), top_k=top_k, computed_at=computed_at)
+    current = set(
+        SimilarGame.objects.filter(kind=SimilarGame.KIND_CONTENT, game_id__in=game_ids)
+        .values_list('similar_id', flat=True)
+    )
+    neighbours = (previous | current) - game_ids
+    written += build_neighbours(matrix, sorted(neighbours), top_k=top_k, computed_at=computed_at)
+    return written
@@ -0,0 +1,283 @@
+"""
+Full-text search over the game catalog.
+
+The index lives in the database and is maintained by the database itself,
+so every write path (Game saves, admin edits, the bulk ingestion commands)
+keeps it in sync:
+
+* SQLite: an external-content FTS5 table ``gamerank_core_game_fts`` kept
+  up to date by triggers on ``gamerank_core_game``, plus an ``fts5vocab``
+  table used for typo correction. Ranking uses ``bm25()`` with the title
+  weighted highest. SQLite drops the triggers whenever a migration rebuilds
+  the game table (adding or altering a column does), so the index is only
+  used while all of its parts exist. ``repair_index`` (run by
+  ``python manage.py rebuild_search_index``) recreates missing parts, and
+  ``check_query_plans`` fails until it has been run.
+* PostgreSQL: a stored, generated ``search_document`` tsvector column with
+  a GIN index, ranked with ``ts_rank_cd``; typo tolerance uses ``pg_trgm``
+  similarity on the title when it is installed.
+
+Other backends fall back to ``icontains`` matching.
+
+Every query term is matched as a prefix (``forg`` finds "Forge"). Terms that
+do not occur in the catalog are replaced by their closest indexed spellings.
+"""
+import difflib
+import re
+from typing import Dict, List, Optional
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Game
+
+FTS_TABLE = 'gamerank_core_game_fts'
+VOCAB_TABLE = 'gamerank_core_game_fts_vocab'
+
+# bm25() weights, in FTS column order
+FTS_COLUMNS = ['title', 'genre', 'platform', 'developer', 'publisher', 'description']
+FTS_WEIGHTS = [10.0, 2.0, 1.0, 3.0, 2.0, 1.0]
+
+SQLITE_TRIGGERS = ['gamerank_core_game_fts_ai', 'gamerank_core_game_fts_ad', 'gamerank_core_game_fts_au']
+
+MAX_RESULTS = 50
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_SETUP = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {', '.join(FTS_COLUMNS)},
+        content='gamerank_core_game',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS gamerank_core_game_fts_ai AFTER INSERT ON gamerank_core_game BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)})
+        VALUES (new.rowid, {', '.join(f'new.{c}' for c in FTS_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS gamerank_core_game_fts_ad AFTER DELETE ON gamerank_core_game BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)})
+        VALUES ('delete', old.rowid, {', '.join(f'old.{c}' for c in FTS_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS gamerank_core_game_fts_au AFTER UPDATE ON gamerank_core_game BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)})
+        VALUES ('delete', old.rowid, {', '.join(f'old.{c}' for c in FTS_COLUMNS)});
+        INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)})
+        VALUES (new.rowid, {', '.join(f'new.{c}' for c in FTS_COLUMNS)});
+    END
+    """,
+    # Make the hidden "rank" column use the weighted bm25(), so ORDER BY rank
+    # LIMIT n takes FTS5's optimized top-n path
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25({', '.join(str(w) for w in FTS_WEIGHTS)})')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_TEARDOWN = [
+    *(f'DROP TRIGGER IF EXISTS {trigger}' for trigger in SQLITE_TRIGGERS),
+    f'DROP TABLE IF EXISTS {VOCAB_TABLE}',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+POSTGRES_SETUP = [
+    """
+    ALTER TABLE gamerank_core_game ADD COLUMN IF NOT EXISTS search_document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(developer, '') || ' ' || coalesce(publisher, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(genre, '') || ' ' || coalesce(platform, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    'CREATE INDEX IF NOT EXISTS gamerank_core_game_search_idx ON gamerank_core_game USING GIN (search_document)',
+]
+
+POSTGRES_TRIGRAM_SETUP = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS gamerank_core_game_title_trgm_idx ON gamerank_core_game USING GIN (title gin_trgm_ops)',
+]
+
+POSTGRES_TEARDOWN = [
+    'DROP INDEX IF EXISTS gamerank_core_game_title_trgm_idx',
+    'DROP INDEX IF EXISTS gamerank_core_game_search_idx',
+    'ALTER TABLE gamerank_core_game DROP COLUMN IF EXISTS search_document',
+]
+
+
+def tokenize(query: str) -> List[str]:
+    """Split a user query into lowercase search terms."""
+    return [token.lower() for token in TOKEN_RE.findall(query)][:10]
+
+
+def search_games(query: str, limit: int = 20) -> List[Game]:
+    """Return games matching the query, best match first, with a search_rank attribute."""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+    if connection.vendor == 'sqlite' and _sqlite_index_exists():
+        ranked = _search_sqlite(terms, limit)
+    elif connection.vendor == 'postgresql':
+        ranked = _search_postgres(terms, limit)
+    else:
+        return _search_fallback(terms, limit)
+    return _load_ranked(ranked)
+
+
+def rebuild_index() -> None:
+    """Rebuild the SQLite FTS index from the game table (PostgreSQL needs no rebuild)."""
+    if connection.vendor == 'sqlite' and _sqlite_index_exists():
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def missing_index_parts() -> List[str]:
+    """Get the SQLite FTS table and triggers that do not exist (none on other backends)."""
+    if connection.vendor != 'sqlite':
+        return []
+    expected = [FTS_TABLE] + SQLITE_TRIGGERS
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(expected))})", expected
+        )
+        found = {name for name, in cursor.fetchall()}
+    return [name for name in expected if name not in found]
+
+
+def repair_index() -> List[str]:
+    """Recreate the missing parts of the SQLite index and rebuild it, returning what was missing."""
+    global _sqlite_index_checked
+    missing = missing_index_parts()
+    if missing:
+        # The setup only creates what does not exist, and ends with a full rebuild
+        with connection.cursor() as cursor:
+            for statement in SQLITE_SETUP:
+                cursor.execute(statement)
+        _sqlite_index_checked = None
+    return missing
+
+
+def _load_ranked(ranked: Dict[str, float]) -> List[Game]:
+    games = Game.objects.select_related('stats').in_bulk(list(ranked))
+    results = []
+    for game_id, rank in ranked.items():
+        game = games.get(game_id)
+        if game is not None:
+            game.search_rank = rank
+            results.append(game)
+    return results
+
+
+_sqlite_index_checked: Optional[bool] = None
+
+
+def _sqlite_index_exists() -> bool:
+    global _sqlite_index_checked
+    if _sqlite_index_checked:
+        return True
+    # Without its triggers the index goes stale, so search falls back to
+    # matching the game table; only a complete index is remembered
+    complete = not missing_index_parts()
+    if complete:
+        _sqlite_index_checked = True
+    return complete
+
+
+def _search_sqlite(terms: List[str], limit: int) -> Dict[str, float]:
+    with connection.cursor() as cursor:
+        clauses = []
+        for term in terms:
+            alternatives = [f'"{term}"*'] + [f'"{alt}"' for alt in _sqlite_corrections(cursor, term)]
+            clauses.append('(' + ' OR '.join(alternatives) + ')')
+        # Rank and limit inside FTS5 first, then join only the top rows
+        cursor.execute(
+            f"""
+            SELECT g.id, hits.rank
+            FROM (
+                SELECT rowid, rank FROM {FTS_TABLE}
+                WHERE {FTS_TABLE} MATCH %s
+                ORDER BY rank
+                LIMIT %s
+            ) AS hits
+            JOIN gamerank_core_game g ON g.rowid = hits.rowid
+            ORDER BY hits.rank
+            """,
+            [' AND '.join(clauses), limit],
+        )
+        # bm25() is lower-is-better; expose higher-is-better like ts_rank
+        return {game_id: -rank for game_id, rank in cursor.fetchall()}
+
+
+def _sqlite_corrections(cursor, term: str) -> List[str]:
+    """Find indexed spellings close to a term that does not occur in the catalog."""
+    if len(term) < 4:
+        return []
+    cursor.execute(
+        f'SELECT 1 FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s LIMIT 1',
+        [term, term + '\uffff'],
+    )
+    if cursor.fetchone():
+        return []
+    # Candidates share the first letter; typos there are rare and this keeps
+    # the vocabulary scan to a single index range.
+    cursor.execute(
+        f'SELECT term FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s LIMIT 5000',
+        [term[0], term[0] + '\uffff'],
+    )
+    candidates = [row[0] for row in cursor.fetchall() if abs(len(row[0]) - len(term)) <= 2]
+    return difflib.get_close_matches(term, candidates, n=3, cutoff=0.75)
+
+
+def _search_postgres(terms: List[str], limit: int) -> Dict[str, float]:
+    # Terms are plain word characters (see tokenize), safe inside a tsquery
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT id, ts_rank_cd(search_document, query) AS rank
+            FROM gamerank_core_game, to_tsquery('simple', %s) AS query
+            WHERE search_document @@ query
+            ORDER BY rank DESC, id
+            LIMIT %s
+            """,
+            [tsquery, limit],
+        )
+        ranked = {game_id: rank for game_id, rank in cursor.fetchall()}
+        if ranked or not _postgres_has_trigram(cursor):
+            return ranked
+        # Nothing matched exactly: fall back to title similarity for typos
+        cursor.execute(
+            """
+            SELECT id, similarity(title, %s) AS rank
+            FROM gamerank_core_game
+            WHERE title %% %s
+            ORDER BY rank DESC, id
+            LIMIT %s
+            """,
+            [' '.join(terms), ' '.join(terms), limit],
+        )
+        return {game_id: rank for game_id, rank in cursor.fetchall()}
+
+
+def _postgres_has_trigram(cursor) -> bool:
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    return cursor.fetchone() is not None
+
+
+def _search_fallback(terms: List[str], limit: int) -> List[Game]:
+    queryset = Game.objects.select_related('stats')
+    for term in terms:
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(developer__icontains=term)
+            | Q(publisher__icontains=term) | Q(description__icontains=term)
+        )
+    results = list(queryset.order_by('-stats__rank_score')[:limit])
+    for game in results:
+        game.search_rank = 0.0
+    return results
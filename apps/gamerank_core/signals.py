@@ -0,0 +1,102 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, facets, stats, trending
+from .models import Comment, Follow, Game, GameStats, Vote
+from .ranking import rank_value
+
+
+@receiver(post_save, sender=Game)
+def create_game_stats(sender: type[Game], instance: Game, created: bool, **kwargs: dict) -> None:
+    """Create an empty GameStats row for every new game."""
+    if created:
+        GameStats.objects.get_or_create(game=instance, defaults={'rank_score': rank_value(0, 0)})
+
+
+@receiver(post_save, sender=Game)
+def bump_game_version(sender: type[Game], instance: Game, created: bool, **kwargs: dict) -> None:
+    """Make cached detail pages of an edited game stale."""
+    if not created:
+        GameStats.objects.filter(game=instance).update(version=F('version') + 1)
+    caching.invalidate_game(instance.pk)
+
+
+@receiver(post_save, sender=Game)
+def update_facet_counts(sender: type[Game], instance: Game, created: bool, **kwargs: dict) -> None:
+    """Move the game between facet values when its platform, genre, source or year change."""
+    new = facets.game_facets(instance)
+    if created:
+        facets.apply_game_change(None, new)
+    elif getattr(instance, '_loaded_facets', None) is not None and new is not None:
+        facets.apply_game_change(instance._loaded_facets, new)
+    else:
+        # Saved without being loaded first, so the previous values are unknown.
+        facets.rebuild_facet_counts()
+    instance._loaded_facets = new
+
+
+@receiver(post_delete, sender=Game)
+def remove_facet_counts(sender: type[Game], instance: Game, **kwargs: dict) -> None:
+    facets.apply_game_change(getattr(instance, '_loaded_facets', None) or facets.game_facets(instance), None)
+    caching.invalidate_game(instance.pk)
+
+
+@receiver(post_save, sender=Vote)
+def vote_saved(sender: type[Vote], instance: Vote, created: bool, **kwargs: dict) -> None:
+    """Apply a new or changed vote to the game's stats and activity."""
+    if created or getattr(instance, '_loaded_score', None) != instance.score:
+        trending.record_activity(instance.game_id, votes=1)
+        caching.invalidate_game(instance.game_id)
+    if created:
+        stats.apply_vote_change(instance.game_id, None, instance.score)
+        stats.apply_user_vote_change(instance.user_id, None, instance.score)
+    elif hasattr(instance, '_loaded_score'):
+        stats.apply_vote_change(instance.game_id, instance._loaded_score, instance.score)
+        stats.apply_user_vote_change(instance.user_id, instance._loaded_score, instance.score)
+    else:
+        # Saved without being loaded first, so the previous score is unknown.
+        stats.rebuild_game_stats([instance.game_id])
+        stats.rebuild_user_stats([instance.user_id])
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Vote)
+def vote_deleted(sender: type[Vote], instance: Vote, **kwargs: dict) -> None:
+    """Remove a deleted vote from the game's stats."""
+    score = getattr(instance, '_loaded_score', instance.score)
+    stats.apply_vote_change(instance.game_id, score, None)
+    caching.invalidate_game(instance.game_id)
+    stats.apply_user_vote_change(instance.user_id, score, None)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender: type[Follow], instance: Follow, created: bool, **kwargs: dict) -> None:
+    if created:
+        stats.apply_follow_change(instance.game_id, 1)
+        trending.record_activity(instance.game_id, follows=1)
+        caching.invalidate_game(instance.game_id, listing=False)
+        stats.apply_user_change(instance.user_id, {'follow_count': 1})
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender: type[Follow], instance: Follow, **kwargs: dict) -> None:
+    stats.apply_follow_change(instance.game_id, -1)
+    caching.invalidate_game(instance.game_id, listing=False)
+    stats.apply_user_change(instance.user_id, {'follow_count': -1}, create_missing=False)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender: type[Comment], instance: Comment, created: bool, **kwargs: dict) -> None:
+    if created:
+        stats.apply_comment_change(instance.game_id, 1)
+        trending.record_activity(instance.game_id, comments=1)
+        caching.invalidate_game(instance.game_id, listing=False)
+        stats.apply_user_change(instance.user_id, {'comment_count': 1})
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender: type[Comment], instance: Comment, **kwargs: dict) -> None:
+    stats.apply_comment_change(instance.game_id, -1)
+    caching.invalidate_game(instance.game_id, listing=False)
+    stats.apply_user_change(instance.user_id, {'comment_count': -1}, create_missing=False)
@@ -0,0 +1,216 @@
+"""
+Maintenance of the denormalized GameStats and UserStats read models.
+
+Every write to Vote, Follow or Comment is turned into a set of counter
+deltas applied with a single ``UPDATE ... SET x = x + n`` on the game's
+and the user's stats rows, so callers must run inside the same transaction
+as the write.
+
+User stats are read with one primary-key lookup per request (or joined
+with ``select_related('stats')``) and never cached across requests: with a
+per-process cache, other workers would keep showing old counts.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Now
+
+from .models import Comment, Follow, GameStats, UserStats, Vote
+from .ranking import rank_expression, rank_value
+
+COUNTER_FIELDS = [
+    'vote_sum',
+    'vote_count',
+    'votes_0',
+    'votes_1',
+    'votes_2',
+    'votes_3',
+    'votes_4',
+    'votes_5',
+    'follower_count',
+    'comment_count',
+]
+
+STORED_FIELDS = COUNTER_FIELDS + ['rank_score']
+
+USER_COUNTER_FIELDS = ['vote_count', 'vote_sum', 'follow_count', 'comment_count']
+
+
+def apply_vote_change(game_id: str, old_score: Optional[int], new_score: Optional[int]) -> None:
+    """Update counters for a vote going from old_score to new_score (None means no vote)."""
+    apply_vote_changes(game_id, [(old_score, new_score)])
+
+
+def apply_vote_changes(game_id: str, changes: Iterable[Tuple[Optional[int], Optional[int]]]) -> None:
+    """Update counters for several (old_score, new_score) vote changes on one game in one UPDATE."""
+    deltas: Dict[str, int] = {}
+    create_missing = False
+    for old_score, new_score in changes:
+        if old_score is not None:
+            deltas['vote_sum'] = deltas.get('vote_sum', 0) - old_score
+            deltas['vote_count'] = deltas.get('vote_count', 0) - 1
+            deltas[f'votes_{old_score}'] = deltas.get(f'votes_{old_score}', 0) - 1
+        if new_score is not None:
+            deltas['vote_sum'] = deltas.get('vote_sum', 0) + new_score
+            deltas['vote_count'] = deltas.get('vote_count', 0) + 1
+            deltas[f'votes_{new_score}'] = deltas.get(f'votes_{new_score}', 0) + 1
+            create_missing = True
+    _apply(game_id, deltas, create_missing=create_missing)
+
+
+def apply_follow_change(game_id: str, delta: int) -> None:
+    """Update the follower counter by delta."""
+    _apply(game_id, {'follower_count': delta}, create_missing=delta > 0)
+
+
+def apply_comment_change(game_id: str, delta: int) -> None:
+    """Update the comment counter by delta."""
+    _apply(game_id, {'comment_count': delta}, create_missing=delta > 0)
+
+
+def _apply(game_id: str, deltas: Dict[str, int], create_missing: bool) -> None:
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    if 'vote_sum' in updates or 'vote_count' in updates:
+        # SET expressions see the pre-update row, so rank from the new values
+        updates['rank_score'] = rank_expression(
+            F('vote_sum') + deltas.get('vote_sum', 0),
+            F('vote_count') + deltas.get('vote_count', 0),
+        )
+    if any(field.startswith('vote') for field in updates):
+        updates['votes_changed_at'] = Now()
+    if 'comment_count' in updates:
+        updates['comments_changed_at'] = Now()
+    updates['version'] = F('version') + 1
+    updated = GameStats.objects.filter(game_id=game_id).update(**updates)
+    if not updated and create_missing:
+        # The row predates the stats table: rebuild it from the source tables,
+        # which already include the write being recorded.
+        rebuild_game_stats([game_id])
+
+
+def collect_game_stats(game_ids: Iterable[str]) -> Dict[str, GameStats]:
+    """Compute fresh (unsaved) stats for the given games from the source tables."""
+    game_ids = list(game_ids)
+    stats = {game_id: GameStats(game_id=game_id) for game_id in game_ids}
+
+    vote_rows = (
+        Vote.objects.filter(game_id__in=game_ids)
+        .order_by()
+        .values('game_id', 'score')
+        .annotate(n=Count('id'), total=Sum('score'))
+    )
+    for row in vote_rows:
+        entry = stats[row['game_id']]
+        entry.vote_count += row['n']
+        entry.vote_sum += row['total']
+        setattr(entry, f"votes_{row['score']}", row['n'])
+
+    follow_rows = (
+        Follow.objects.filter(game_id__in=game_ids)
+        .order_by()
+        .values('game_id')
+        .annotate(n=Count('id'))
+    )
+    for row in follow_rows:
+        stats[row['game_id']].follower_count = row['n']
+
+    comment_rows = (
+        Comment.objects.filter(game_id__in=game_ids)
+        .order_by()
+        .values('game_id')
+        .annotate(n=Count('id'))
+    )
+    for row in comment_rows:
+        stats[row['game_id']].comment_count = row['n']
+
+    for entry in stats.values():
+        entry.rank_score = rank_value(entry.vote_sum, entry.vote_count)
+    return stats
+
+
+def rebuild_game_stats(game_ids: Iterable[str]) -> int:
+    """Recompute and store stats for the given games, returning the number of rows written."""
+    stats = list(collect_game_stats(game_ids).values())
+    GameStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['game'],
+        update_fields=STORED_FIELDS,
+    )
+    # The counters may have changed, so cached detail pages are stale
+    GameStats.objects.filter(game_id__in=[entry.game_id for entry in stats]).update(version=F('version') + 1)
+    return len(stats)
+
+
+def get_user_stats(user: User) -> UserStats:
+    """Get a user's stats: joined row, then per-instance memo, then database."""
+    fields_cache = user._state.fields_cache
+    if 'stats' in fields_cache:
+        # Loaded with select_related('stats'); None means the user has no activity yet
+        return fields_cache['stats'] or UserStats(user_id=user.pk)
+    memo = user.__dict__.get('_gamerank_stats')
+    if memo is not None:
+        return memo
+
+    user_stats = UserStats.objects.filter(user_id=user.pk).first() or UserStats(user_id=user.pk)
+    user.__dict__['_gamerank_stats'] = user_stats
+    return user_stats
+
+
+def apply_user_change(user_id: int, deltas: Dict[str, int], create_missing: bool = True) -> None:
+    """Update a user's counters by the given deltas."""
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    updates['version'] = F('version') + 1
+    updated = UserStats.objects.filter(user_id=user_id).update(**updates)
+    if not updated and create_missing:
+        # First activity of this user (or activity predating the table): the
+        # source tables already include the write being recorded.
+        rebuild_user_stats([user_id])
+
+
+def apply_user_vote_change(user_id: int, old_score: Optional[int], new_score: Optional[int]) -> None:
+    """Update a user's vote counters for a vote going from old_score to new_score."""
+    apply_user_change(user_id, {
+        'vote_count': (new_score is not None) - (old_score is not None),
+        'vote_sum': (new_score or 0) - (old_score or 0),
+    }, create_missing=new_score is not None)
+
+
+def collect_user_stats(user_ids: Iterable[int]) -> Dict[int, UserStats]:
+    """Compute fresh (unsaved) stats for the given users from the source tables."""
+    user_ids = list(user_ids)
+    stats = {user_id: UserStats(user_id=user_id) for user_id in user_ids}
+
+    vote_rows = (
+        Vote.objects.filter(user_id__in=user_ids)
+        .order_by()
+        .values('user_id')
+        .annotate(n=Count('id'), total=Sum('score'))
+    )
+    for row in vote_rows:
+        stats[row['user_id']].vote_count = row['n']
+        stats[row['user_id']].vote_sum = row['total'] or 0
+
+    for model, field in ((Follow, 'follow_count'), (Comment, 'comment_count')):
+        rows = model.objects.filter(user_id__in=user_ids).order_by().values('user_id').annotate(n=Count('id'))
+        for row in rows:
+            setattr(stats[row['user_id']], field, row['n'])
+    return stats
+
+
+def rebuild_user_stats(user_ids: Iterable[int]) -> int:
+    """Recompute and store stats for the given users, returning the number of rows written."""
+    stats = list(collect_user_stats(user_ids).values())
+    UserStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=USER_COUNTER_FIELDS,
+    )
+    UserStats.objects.filter(user_id__in=[entry.user_id for entry in stats]).update(version=F('version') + 1)
+    return len(stats)
@@ -0,0 +1,71 @@
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from ..caching import count
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def update_query(context, **kwargs) -> str:
+    """Build a query string from the current one with some parameters replaced.
+
+    Parameters set to None or '' are removed. The page cursor is always
+    dropped unless given, since it is only valid for the listing it came from.
+    """
+    query = context['request'].GET.copy()
+    query.pop('cursor', None)
+    for key, value in kwargs.items():
+        if value is None or value == '':
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return '?' + query.urlencode() if query else '?'
+
+
+@register.simple_tag(takes_context=True)
+def toggle_filter(context, name: str, value: str) -> str:
+    """Link to the current listing with a filter added, or removed if already set to value."""
+    current = context['request'].GET.get(name)
+    return update_query(context, **{name: None if current == value else value})
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, timeout, name: str, vary_on) -> None:
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context) -> str:
+        timeout = self.timeout.resolve(context)
+        key = make_template_fragment_key(self.name, [var.resolve(context) for var in self.vary_on])
+        value = cache.get(key)
+        if value is not None:
+            count('fragment', 'hit')
+            return value
+        count('fragment', 'miss')
+        value = self.nodelist.render(context)
+        cache.set(key, value, timeout)
+        return value
+
+
+@register.tag
+def cachefragment(parser, token):
+    """Like {% cache %}, counting hits and misses (see caching.py).
+
+    Usage: {% cachefragment timeout name [vary_on ...] %} ... {% endcachefragment %};
+    vary on values that change with the data, e.g. game.stats.version.
+    """
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes at least a timeout and a fragment name.")
+    return CacheFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        bits[2],
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
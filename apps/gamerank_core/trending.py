@@ -0,0 +1,146 @@
+"""
+Trending games from time-bucketed activity counters.
+
+Every vote, follow and comment increments the game's row for the current
+hour in ``GameActivityBucket`` (one ``INSERT ... ON CONFLICT`` statement),
+so the trending query only reads the buckets inside its window and never
+the Vote, Follow or Comment tables. ``compact_activity`` merges hourly
+buckets older than ``HOURLY_RETENTION`` into daily ones and drops buckets
+older than the longest window.
+
+The trending score of a game is its weighted activity with linear time
+decay: a bucket counts fully when it is current and not at all once it is
+as old as the window.
+"""
+import datetime
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, QuerySet, Sum, Value
+from django.db.models.functions import Greatest
+
+from .db import increment_rows
+from .models import Comment, Follow, Game, GameActivityBucket, Vote
+
+WINDOWS = {
+    'hour': 1,
+    'day': 24,
+    'week': 24 * 7,
+}
+DEFAULT_WINDOW = 'day'
+
+# A follow or a comment says more about interest than a single vote
+ACTIVITY_WEIGHTS = {
+    'votes': 1.0,
+    'follows': 2.0,
+    'comments': 1.5,
+}
+
+KEY_FIELDS = ['game', 'hour', 'span_hours']
+COUNTER_FIELDS = list(ACTIVITY_WEIGHTS)
+
+# Hourly buckets are kept this long before being merged into daily ones
+HOURLY_RETENTION = 48
+# Nothing older than the longest window (plus the partial day) is needed
+RETENTION = WINDOWS['week'] + 24
+
+
+def current_hour(timestamp: Optional[float] = None) -> int:
+    """Get the hour bucket for a Unix timestamp (default: now)."""
+    return int((time.time() if timestamp is None else timestamp) // 3600)
+
+
+def record_activity(game_id: str, votes: int = 0, follows: int = 0, comments: int = 0) -> None:
+    """Add activity to the game's bucket for the current hour."""
+    record_activities([(game_id, votes, follows, comments)])
+
+
+def record_activities(rows: Iterable[Tuple[str, int, int, int]]) -> None:
+    """Add (game_id, votes, follows, comments) activity to the current hour's buckets."""
+    hour = current_hour()
+    increment_rows(
+        GameActivityBucket, KEY_FIELDS, COUNTER_FIELDS,
+        [(game_id, hour, 1, votes, follows, comments) for game_id, votes, follows, comments in rows],
+    )
+
+
+def trending_games(window: str = DEFAULT_WINDOW, limit: int = 20) -> QuerySet:
+    """Get the games with the most recent activity in the window, with a trend_score, in one query."""
+    hours = WINDOWS[window]
+    now = current_hour()
+    # Age of a bucket's last hour; the current hour is still filling, so age 0
+    age = Value(now) - F('activity__hour') - F('activity__span_hours') + Value(1)
+    weight = Greatest(
+        Value(0.0),
+        Value(1.0) - ExpressionWrapper(age * 1.0 / Value(float(hours + 1)), output_field=FloatField()),
+        output_field=FloatField(),
+    )
+    activity = sum(
+        (F(f'activity__{field}') * Value(factor) for field, factor in ACTIVITY_WEIGHTS.items()),
+        Value(0.0),
+    )
+    return (
+        # Daily buckets may start up to a day before the window and still overlap it
+        Game.objects.filter(activity__hour__gt=now - hours - 24)
+        .select_related('stats')
+        .annotate(trend_score=Sum(ExpressionWrapper(activity * weight, output_field=FloatField())))
+        .filter(trend_score__gt=0)
+        .order_by('-trend_score', 'pk')[:limit]
+    )
+
+
+def compact_activity(now: Optional[int] = None) -> Tuple[int, int]:
+    """Merge old hourly buckets into daily ones and drop expired buckets.
+
+    Returns the number of hourly buckets merged and of buckets deleted.
+    """
+    now = current_hour() if now is None else now
+    cutoff = now - HOURLY_RETENTION
+    # Only whole days are merged, so a daily bucket never overlaps hourly ones
+    cutoff -= cutoff % 24
+    with transaction.atomic():
+        hourly = GameActivityBucket.objects.filter(span_hours=1, hour__lt=cutoff)
+        days: Dict[Tuple[str, int], List[int]] = {}
+        merged = 0
+        for game_id, hour, *counts in hourly.values_list(
+            'game_id', 'hour', *COUNTER_FIELDS
+        ).iterator():
+            totals = days.setdefault((game_id, hour - hour % 24), [0] * len(COUNTER_FIELDS))
+            for i, count in enumerate(counts):
+                totals[i] += count
+            merged += 1
+        increment_rows(
+            GameActivityBucket, KEY_FIELDS, COUNTER_FIELDS,
+            [(game_id, day, 24, *totals) for (game_id, day), totals in days.items()],
+        )
+        hourly.delete()
+        deleted, _ = GameActivityBucket.objects.filter(hour__lt=now - RETENTION).delete()
+    return merged, deleted
+
+
+def rebuild_activity(now: Optional[float] = None) -> int:
+    """Recompute the buckets of the retention period from the source tables, returning the row count.
+
+    Follows and comments removed since no longer count, unlike with the live
+    counters. Meant for backfilling once, as it reads the raw tables.
+    """
+    now = time.time() if now is None else now
+    since = datetime.datetime.fromtimestamp((current_hour(now) - RETENTION) * 3600, tz=datetime.timezone.utc)
+
+    counts: Dict[Tuple[str, int], List[int]] = {}
+    for i, model in enumerate((Vote, Follow, Comment)):
+        for game_id, created_at in (
+            model.objects.filter(created_at__gte=since).values_list('game_id', 'created_at').iterator()
+        ):
+            key = (game_id, current_hour(created_at.timestamp()))
+            counts.setdefault(key, [0] * len(COUNTER_FIELDS))[i] += 1
+
+    with transaction.atomic():
+        GameActivityBucket.objects.all().delete()
+        increment_rows(
+            GameActivityBucket, KEY_FIELDS, COUNTER_FIELDS,
+            [(game_id, hour, 1, *totals) for (game_id, hour), totals in counts.items()],
+        )
+        compact_activity(current_hour(now))
+    return len(counts)
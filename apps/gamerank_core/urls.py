@@ -1,13 +1,35 @@
-from django.urls import path
-from . import views
+from django.urls import path, register_converter
+from . import trending, views
+
+
+class TrendingWindowConverter:
+    regex = '|'.join(trending.WINDOWS)
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+register_converter(TrendingWindowConverter, 'trending_window')
 
 app_name = 'gamerank_core'
 
 urlpatterns = [
     path('', views.GameListView.as_view(), name='home'),
+    path('trending/', views.TrendingView.as_view(), name='trending'),
+    path('trending/<trending_window:window>/', views.TrendingView.as_view(), name='trending_window'),
+    path('trending/<trending_window:window>.json', views.trending_json_endpoint, name='trending_json'),
+    path('search/', views.GameSearchView.as_view(), name='search'),
+    path('search.json', views.search_json_endpoint, name='search_json'),
+    path('games.json', views.games_json_endpoint, name='games_json'),
     path('game/<str:pk>/', views.GameDetailView.as_view(), name='game_detail'),
     path('game/<str:pk>/htmx/', views.GameDetailHTMXView.as_view(), name='game_detail_htmx'),
     path('game/<str:pk>.json', views.game_json_endpoint, name='game_json'),
+    path('game/<str:pk>/similar.json', views.similar_games_json_endpoint, name='game_similar_json'),
     path('game/<str:pk>/action/', views.GameActionView.as_view(), name='game_action'),
+    path('export/<str:dataset>.<str:fmt>', views.export_endpoint, name='export'),
+    path('votes.json', views.bulk_vote_endpoint, name='bulk_votes'),
     # Add other core URLs here (e.g., vote, follow, comment actions)
 ] 
\ No newline at end of file
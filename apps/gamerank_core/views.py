@@ -1,50 +1,101 @@
-from django.http import JsonResponse, HttpResponse, HttpResponseRedirect
+import datetime
+import json
+
+from django.http import JsonResponse, HttpResponse, HttpResponseRedirect, Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.generic import ListView, DetailView, View
-from django.db.models import Count, Avg
+from django.views.generic import ListView, DetailView, View, TemplateView
+from django.db import transaction
 from django.urls import reverse
 from django.contrib import messages # For user feedback
-from .models import Game, Comment, Vote, Follow
+from django.conf import settings
+from .models import Game, Comment, Follow, SimilarGame
+from . import etags, exports, facets, trending
 from .forms import VoteForm, FollowForm, CommentForm
+from .caching import cache_anonymous_page, request_viewer
+from .detail import comments_page, get_game_detail
+from .pagination import InvalidCursor, KeysetPaginationMixin, KeysetPaginator
+from .querybudget import with_query_budget
+from .recommendations import similar_games
+from .search import search_games
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition, require_POST
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .votes import UnknownGames, buffering_enabled, queue_votes, record_votes
 
 # Fully implemented Views
 
-class GameListView(ListView):
+@method_decorator(condition(etag_func=etags.game_list_etag), name='get')
+@method_decorator(cache_anonymous_page(lambda request: ['games']), name='get')
+class GameListView(KeysetPaginationMixin, ListView):
     model = Game
     template_name = 'gamerank_core/home.html'
     context_object_name = 'games'
     paginate_by = 12 # Add pagination
+    # Order by the precomputed rank score, walking gamestats_rank_idx
+    cursor_ordering = ('-stats__rank_score', 'stats__game_id')
+    # ETag (newest game and vote, catalog size), page (games + stats), cached
+    # total, facet counts; session, user and profile settings only without an
+    # auth token
+    query_budget = 9
 
     def get_queryset(self):
-        # Order by average score (annotated) descending, then by title
-        return Game.objects.annotate(
-            avg_score=Avg('votes__score') # Annotate average score
-        ).order_by('-avg_score', 'title')
+        # The inner join (every game has a stats row) lets the planner drive
+        # the query from the index instead of sorting the game table.
+        queryset = Game.objects.select_related('stats').filter(stats__isnull=False)
+        return facets.filter_games(queryset, self.active_filters)
+
+    @property
+    def active_filters(self):
+        if not settings.ENABLE_PLATFORM_FILTERING:
+            return {}
+        return facets.get_active_filters(self.request.GET)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if settings.ENABLE_PLATFORM_FILTERING:
+            active = self.active_filters
+            # Counts come from the FacetCount table, one query for all facets
+            context['facets'] = [
+                (name, facets.FACET_LABELS[name], [
+                    (value, count, active.get(name) == value) for value, count in values
+                ])
+                for name, values in facets.get_facets().items()
+            ]
+            context['active_filters'] = active
+        return context
 
+@method_decorator(condition(etag_func=etags.game_page_etag), name='get')
+@method_decorator(cache_anonymous_page(lambda request, pk: [f'game:{pk}']), name='get')
 class GameDetailView(DetailView):
     model = Game
     template_name = 'gamerank_core/game_detail.html'
+    # ETag (version, pending vote), version + user vote and follow; session,
+    # user and profile settings only without an auth token; on a cache miss
+    # also game + stats, comments + authors, vote and content neighbours
+    query_budget = 10
+
+    def get_object(self, queryset=None):
+        # Shared data comes from the cached read model (see detail.py)
+        user_id, _ = request_viewer(self.request)
+        self.detail, self.user_state = get_game_detail(self.kwargs['pk'], user_id)
+        return self.detail['game']
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        game = self.get_object()
-        user = self.request.user
 
         # Add forms to context
         context['comment_form'] = CommentForm()
         context['vote_form'] = VoteForm()
         context['follow_form'] = FollowForm()
-        
-        # Add related data if user is authenticated
-        if user.is_authenticated:
-            context['user_vote'] = Vote.objects.filter(game=game, user=user).first()
-            context['user_follow'] = Follow.objects.filter(game=game, user=user).exists()
-            
-        # Add comments (consider pagination later if needed)
-        context['comments'] = Comment.objects.filter(game=game).order_by('-created_at')[:20]
-        
+        context.update(self.user_state)
+
+        context['comments'] = self.detail['comments']
+        context['next_cursor'] = self.detail['next_cursor']
+        context['poll_after'] = context['comments'][0].id if context['comments'] else 0
+        context['also_liked'] = self.detail['also_liked']
+        context['similar'] = self.detail['similar']
         return context
 
 # --- HTMX View and Action Views --- 
@@ -53,23 +104,37 @@ class GameDetailView(DetailView):
 @method_decorator(login_required, name='dispatch')
 class GameActionView(View):
     def post(self, request, pk):
-        game = get_object_or_404(Game, pk=pk)
+        if request.POST.get('action') == 'vote':
+            # Upserted in one statement, without loading the game first
+            self.handle_vote(request, pk)
+        else:
+            # Writes and their GameStats updates (via signals) commit together
+            with transaction.atomic():
+                game = get_object_or_404(Game, pk=pk)
+                self.handle_action(request, game)
+
+        # Redirect back to the game detail page after action
+        return redirect(reverse('gamerank_core:game_detail', kwargs={'pk': pk}))
+
+    def handle_vote(self, request, pk):
+        form = VoteForm(request.POST)
+        if not form.is_valid():
+            messages.error(request, "Invalid vote score.")
+            return
+        score = form.cleaned_data['score']
+        # In write-behind mode the vote is queued and applied by flush_vote_buffer
+        write = queue_votes if buffering_enabled() else record_votes
+        try:
+            write(request.user.pk, {pk: score})
+        except UnknownGames:
+            raise Http404('No Game matches the given query.')
+        messages.success(request, f"Your vote ({score}) has been recorded.")
+
+    def handle_action(self, request, game):
         action = request.POST.get('action')
         user = request.user # Now we can safely assume user is authenticated
 
-        if action == 'vote':
-            form = VoteForm(request.POST)
-            if form.is_valid():
-                vote, created = Vote.objects.update_or_create(
-                    game=game,
-                    user=user,
-                    defaults={'score': form.cleaned_data['score']}
-                )
-                messages.success(request, f"Your vote ({vote.score}) has been recorded.")
-            else:
-                messages.error(request, "Invalid vote score.")
-        
-        elif action == 'follow':
+        if action == 'follow':
             follow, created = Follow.objects.get_or_create(game=game, user=user)
             if created:
                 messages.success(request, f"You are now following {game.title}.")
@@ -89,41 +154,306 @@ class GameActionView(View):
             else:
                  messages.error(request, "Could not post your comment.")
 
-        # Redirect back to the game detail page after action
-        return redirect(reverse('gamerank_core:game_detail', kwargs={'pk': pk}))
-
 
 # Placeholder for specific HTMX partials (e.g., comment list refresh)
+MAX_NEW_COMMENTS = 50
+
+
+@method_decorator(condition(etag_func=etags.comments_etag), name='get')
 class GameDetailHTMXView(View):
-    def get(self, request, *args, **kwargs):
-        # Example: Return just the comments section HTML
-        # game = get_object_or_404(Game, pk=kwargs['pk'])
-        # comments = Comment.objects.filter(game=game).order_by('-created_at')[:20]
-        # return render(request, 'gamerank_core/partials/comments.html', {'comments': comments})
-        return HttpResponse("HTMX placeholder - implement partials later") 
+    """Comments fragment for HTMX: older pages by ``?cursor=``, new comments by ``?after=<id>``.
+
+    Idle pollers send If-None-Match and get a 304 after one primary key lookup.
+    """
+    # ETag (stats row), comments + authors, game lookup when there are none
+    query_budget = 3
+
+    def get(self, request, pk):
+        context = {'game_id': pk}
+        after = request.GET.get('after')
+        if after is not None:
+            try:
+                after = int(after)
+            except ValueError:
+                return HttpResponse('after must be a comment id', status=400)
+            # Ids grow with creation time; oldest first, so a burst larger
+            # than the limit arrives over several polls
+            new = list(
+                Comment.objects.filter(game_id=pk, id__gt=after).select_related('user')
+                .order_by('id')[:MAX_NEW_COMMENTS]
+            )
+            context['comments'] = new[::-1]
+            context['poll_after'] = new[-1].id if new else after
+        else:
+            try:
+                page = comments_page(pk, request.GET.get('cursor'))
+            except InvalidCursor:
+                return HttpResponse('Invalid page cursor.', status=400)
+            if not page.object_list and not Game.objects.filter(pk=pk).exists():
+                raise Http404('No Game matches the given query.')
+            context['comments'] = page
+            context['next_cursor'] = page.next_cursor
+        return render(request, 'gamerank_core/partials/comments.html', context)
+
+# JSON field name -> (columns to load, value); stats columns come from the joined stats row
+GAME_JSON_FIELDS = {
+    'id': ((), lambda game: game.id),
+    'title': (('title',), lambda game: game.title),
+    'platform': (('platform',), lambda game: game.platform),
+    'genre': (('genre',), lambda game: game.genre),
+    'developer': (('developer',), lambda game: game.developer),
+    'publisher': (('publisher',), lambda game: game.publisher),
+    'release_date': (('release_date',), lambda game: game.release_date.isoformat()),
+    'description': (('description',), lambda game: game.description),
+    'image_url': (('image_url',), lambda game: game.image_url),
+    'source': (('source',), lambda game: game.source),
+    'average_score': (('stats__vote_sum', 'stats__vote_count'), lambda game: game.average_score),
+    'votes_count': (('stats__vote_count',), lambda game: game.votes_count),
+    'followers_count': (('stats__follower_count',), lambda game: game.followers_count),
+    'comment_count': (('stats__comment_count',), lambda game: game.comments_count),
+}
+DEFAULT_GAME_JSON_FIELDS = [name for name in GAME_JSON_FIELDS if name != 'followers_count']
+MAX_BATCH_GAMES = 100
+
 
+def serialize_game(game, fields=DEFAULT_GAME_JSON_FIELDS):
+    return {name: GAME_JSON_FIELDS[name][1](game) for name in fields}
+
+
+@with_query_budget(2)
+@condition(etag_func=etags.game_etag)
 def game_json_endpoint(request, pk):
     try:
-        # Use the annotated average score from GameListView if possible, or re-annotate
-        game = Game.objects.annotate(
-            comment_count=Count('comments'), 
-            avg_score=Avg('votes__score') 
-        ).get(pk=pk)
-        data = {
+        # All counters come from the denormalized stats row
+        game = Game.objects.select_related('stats').get(pk=pk)
+        return JsonResponse(serialize_game(game))
+    except Game.DoesNotExist:
+        return JsonResponse({'error': 'Game not found'}, status=404)
+
+
+@with_query_budget(1)
+def games_json_endpoint(request):
+    """Many games in one request: by ``?ids=a,b,c`` or by facet filters, best ranked first.
+
+    ``?fields=title,average_score`` limits the response (and the columns read)
+    to those fields. Filtered listings are paginated with ``?cursor=``.
+    """
+    fields = [name for name in request.GET.get('fields', '').split(',') if name] or DEFAULT_GAME_JSON_FIELDS
+    unknown = [name for name in fields if name not in GAME_JSON_FIELDS]
+    if unknown:
+        return JsonResponse({'error': f'Unknown fields: {", ".join(unknown)}'}, status=400)
+    if 'id' not in fields:
+        fields = ['id'] + fields
+    columns = {column for name in fields for column in GAME_JSON_FIELDS[name][0]}
+    queryset = Game.objects.select_related('stats').only(*columns)
+
+    ids = [game_id for value in request.GET.getlist('ids') for game_id in value.split(',') if game_id]
+    if ids:
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BATCH_GAMES:
+            return JsonResponse({'error': f'At most {MAX_BATCH_GAMES} ids per request'}, status=400)
+        games = queryset.in_bulk(ids)
+        return JsonResponse({
+            'results': [serialize_game(games[game_id], fields) for game_id in ids if game_id in games],
+            'missing': [game_id for game_id in ids if game_id not in games],
+        })
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), MAX_BATCH_GAMES))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    year = request.GET.get('year', '').strip()
+    if year and not facets.is_valid_year(year):
+        return JsonResponse({'error': 'year must be an integer from 1 to 9999'}, status=400)
+    queryset = facets.filter_games(
+        # The cursor is built from the rank columns
+        queryset.filter(stats__isnull=False).only(*columns, 'stats__rank_score'),
+        facets.get_active_filters(request.GET),
+    )
+    try:
+        page = KeysetPaginator(queryset, GameListView.cursor_ordering, limit).page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'results': [serialize_game(game, fields) for game in page],
+        'next_cursor': page.next_cursor,
+    })
+
+
+@with_query_budget(2)
+def similar_games_json_endpoint(request, pk):
+    kind = request.GET.get('kind', SimilarGame.KIND_CONTENT)
+    if kind not in dict(SimilarGame.KIND_CHOICES):
+        return JsonResponse({'error': f'Unknown kind: {kind}'}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 20))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    neighbours = list(similar_games(Game(pk=pk), kind, limit))
+    if not neighbours and not Game.objects.filter(pk=pk).exists():
+        return JsonResponse({'error': 'Game not found'}, status=404)
+    results = [
+        {
+            'id': neighbour.similar.id,
+            'title': neighbour.similar.title,
+            'platform': neighbour.similar.platform,
+            'genre': neighbour.similar.genre,
+            'average_score': neighbour.similar.average_score,
+            'votes_count': neighbour.similar.votes_count,
+            'similarity': neighbour.score,
+        }
+        for neighbour in neighbours
+    ]
+    return JsonResponse({'id': pk, 'kind': kind, 'results': results})
+
+
+MAX_BULK_VOTES = 500
+
+
+@require_POST
+def bulk_vote_endpoint(request):
+    """Record many votes of the signed-in user at once, e.g. ratings synced from an offline client.
+
+    Expects ``{"votes": [{"game_id": "...", "score": 0-5}, ...]}``; a later
+    entry for the same game wins. Unknown games are skipped and reported.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    try:
+        entries = json.loads(request.body)['votes']
+        scores = {str(entry['game_id']): entry['score'] for entry in entries}
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected {"votes": [{"game_id": ..., "score": ...}]}'}, status=400)
+    if len(entries) > MAX_BULK_VOTES:
+        return JsonResponse({'error': f'At most {MAX_BULK_VOTES} votes per request'}, status=400)
+    invalid = [
+        game_id for game_id, score in scores.items()
+        if not isinstance(score, int) or isinstance(score, bool) or not 0 <= score <= 5
+    ]
+    if invalid:
+        return JsonResponse({'error': 'Scores must be integers from 0 to 5', 'game_ids': invalid}, status=400)
+
+    unknown = []
+    if scores:
+        existing = set(Game.objects.filter(pk__in=list(scores)).values_list('pk', flat=True))
+        unknown = sorted(set(scores) - existing)
+        scores = {game_id: score for game_id, score in scores.items() if game_id in existing}
+    try:
+        if buffering_enabled():
+            queue_votes(request.user.pk, scores)
+            return JsonResponse({'queued': len(scores), 'unknown': unknown}, status=202)
+        previous = record_votes(request.user.pk, scores)
+    except UnknownGames as exc:
+        # A game was deleted in the meantime; the client can retry
+        return JsonResponse({'error': str(exc), 'unknown': exc.game_ids}, status=409)
+    created = sum(1 for score in previous.values() if score is None)
+    return JsonResponse({
+        'recorded': len(previous),
+        'created': created,
+        'updated': len(previous) - created,
+        'unknown': unknown,
+    })
+
+
+class TrendingView(TemplateView):
+    """Games with the most votes, follows and comments in a recent window."""
+    template_name = 'gamerank_core/trending.html'
+    # Trending games + stats from the activity buckets; session, user and
+    # profile settings only without an auth token
+    query_budget = 4
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        window = kwargs.get('window', trending.DEFAULT_WINDOW)
+        context['window'] = window
+        context['windows'] = list(trending.WINDOWS)
+        context['games'] = trending.trending_games(window)
+        return context
+
+
+@with_query_budget(1)
+def trending_json_endpoint(request, window):
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 50))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    results = [
+        {
             'id': game.id,
             'title': game.title,
             'platform': game.platform,
             'genre': game.genre,
-            'developer': game.developer,
-            'publisher': game.publisher,
-            'release_date': game.release_date.isoformat(),
-            'description': game.description,
-            'image_url': game.image_url,
-            'source': game.source,
-            'average_score': game.avg_score or 0.0, # Use annotated score
+            'average_score': game.average_score,
             'votes_count': game.votes_count,
-            'comment_count': game.comment_count
+            'trend_score': game.trend_score,
         }
-        return JsonResponse(data)
-    except Game.DoesNotExist:
-        return JsonResponse({'error': 'Game not found'}, status=404)
+        for game in trending.trending_games(window, limit)
+    ]
+    return JsonResponse({'window': window, 'results': results})
+
+
+def export_endpoint(request, dataset, fmt):
+    """Stream a dataset as NDJSON or CSV for staff, optionally only rows changed ``?since=`` a time.
+
+    ``X-Export-Until`` is where the export stopped; ``X-Export-Next-Since``, a
+    few minutes earlier, is the time to pass as ``since`` next time.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff only'}, status=403)
+    if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+        raise Http404('Unknown export.')
+    since = None
+    if request.GET.get('since'):
+        try:
+            since = parse_datetime(request.GET['since'])
+        except ValueError:
+            # Well formed but not a real date, e.g. month 13
+            since = None
+        if since is None:
+            return JsonResponse({'error': 'since must be an ISO 8601 date and time'}, status=400)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, datetime.timezone.utc)
+    until = timezone.now()
+    response = StreamingHttpResponse(
+        exports.export_lines(dataset, fmt, since, until),
+        content_type=exports.FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+    response['X-Export-Until'] = until.isoformat()
+    response['X-Export-Next-Since'] = exports.next_since(until).isoformat()
+    return response
+
+
+class GameSearchView(TemplateView):
+    template_name = 'gamerank_core/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['games'] = search_games(query) if query else []
+        return context
+
+
+def search_json_endpoint(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = int(request.GET.get('limit', 20))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    results = [
+        {
+            'id': game.id,
+            'title': game.title,
+            'platform': game.platform,
+            'genre': game.genre,
+            'average_score': game.average_score,
+            'votes_count': game.votes_count,
+            'rank': game.search_rank,
+        }
+        for game in search_games(query, limit=limit)
+    ]
+    return JsonResponse({'query': query, 'results': results})
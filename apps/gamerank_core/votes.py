@@ -0,0 +1,153 @@
+"""
+Vote writes as a single ``INSERT ... ON CONFLICT (user, game) DO UPDATE``.
+
+``record_votes`` replaces ``Vote.objects.update_or_create`` (a SELECT then an
+UPDATE or INSERT, which races on the unique constraint) for both the vote
+form and the bulk API. The stats rows of the games are locked first, in a
+fixed order, so concurrent writers to the same game serialize there and the
+previous scores read before the upsert are exact. ``bulk_create`` sends no
+signals, so the GameStats and UserStats deltas and the trending activity
+are applied here.
+
+With ``settings.ENABLE_VOTE_BUFFER`` the views call ``queue_votes`` instead,
+which only appends to the ``PendingVote`` table. ``flush_vote_buffer``
+(run by ``python manage.py flush_vote_buffer``) later applies the queue in
+batches: votes are coalesced per (user, game) keeping the latest score, and
+each game's stats row is updated once per batch instead of once per vote.
+"""
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from . import caching, stats, trending
+from .models import Game, GameStats, PendingVote, Vote
+
+BATCH_SIZE = 500
+
+
+class UnknownGames(Exception):
+    """Raised when votes reference games that do not exist or were removed from their feed."""
+
+    def __init__(self, game_ids: List[str]) -> None:
+        super().__init__(f"Unknown games: {', '.join(game_ids)}")
+        self.game_ids = game_ids
+
+
+def buffering_enabled() -> bool:
+    return getattr(settings, 'ENABLE_VOTE_BUFFER', False)
+
+
+def record_votes(user_id: int, scores: Mapping[str, int]) -> Dict[str, Optional[int]]:
+    """Insert or update a user's votes, returning each game's previous score (None if new)."""
+    with transaction.atomic():
+        previous = _apply_votes({(user_id, game_id): score for game_id, score in scores.items()})
+    return {game_id: previous[(user_id, game_id)] for game_id in sorted(scores)}
+
+
+def queue_votes(user_id: int, scores: Mapping[str, int]) -> None:
+    """Append votes to the write-behind buffer; they count once flush_vote_buffer applies them."""
+    # The foreign key accepts games removed from their feed, so they are checked here
+    removed = sorted(
+        Game.all_objects.filter(pk__in=list(scores), removed_at__isnull=False).values_list('pk', flat=True)
+    )
+    if removed:
+        raise UnknownGames(removed)
+    try:
+        with transaction.atomic():
+            PendingVote.objects.bulk_create(
+                [PendingVote(user_id=user_id, game_id=game_id, score=score) for game_id, score in scores.items()],
+                batch_size=BATCH_SIZE,
+            )
+    except IntegrityError:
+        # Foreign keys are checked at commit on SQLite, so the culprit is not known
+        raise UnknownGames(sorted(scores))
+
+
+def flush_vote_buffer(batch_size: int = 1000) -> int:
+    """Apply up to batch_size queued votes in one transaction, returning how many were consumed."""
+    with transaction.atomic():
+        pending = list(
+            PendingVote.objects.select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', 'user_id', 'game_id', 'score')[:batch_size]
+        )
+        if not pending:
+            return 0
+        latest: Dict[Tuple[int, str], int] = {}
+        for _, user_id, game_id, score in pending:
+            latest[(user_id, game_id)] = score
+        # Games deleted or removed from their feed since the votes were queued simply drop them
+        existing = set(
+            Game.objects.filter(pk__in={game_id for _, game_id in latest}).values_list('pk', flat=True)
+        )
+        _apply_votes({key: score for key, score in latest.items() if key[1] in existing})
+        # Delete exactly the rows read; votes queued meanwhile wait for the next batch
+        PendingVote.objects.filter(pk__in=[row[0] for row in pending]).delete()
+    return len(pending)
+
+
+def _apply_votes(votes: Mapping[Tuple[int, str], int]) -> Dict[Tuple[int, str], Optional[int]]:
+    """Upsert (user_id, game_id) -> score votes and their stats deltas; must run in a transaction."""
+    if not votes:
+        return {}
+    game_ids = sorted({game_id for _, game_id in votes})
+    user_ids = sorted({user_id for user_id, _ in votes})
+
+    locked = _lock_stats(game_ids)
+    missing = [game_id for game_id in game_ids if game_id not in locked]
+    if missing:
+        # Games imported before the stats table have no row yet
+        existing = list(Game.objects.filter(pk__in=missing).values_list('pk', flat=True))
+        stats.rebuild_game_stats(existing)
+        locked |= _lock_stats(existing)
+        unknown = [game_id for game_id in game_ids if game_id not in locked]
+        if unknown:
+            raise UnknownGames(unknown)
+
+    previous = {
+        (user_id, game_id): score
+        for user_id, game_id, score in Vote.objects.filter(
+            user_id__in=user_ids, game_id__in=game_ids
+        ).values_list('user_id', 'game_id', 'score')
+        if (user_id, game_id) in votes
+    }
+    Vote.objects.bulk_create(
+        [Vote(user_id=user_id, game_id=game_id, score=score) for (user_id, game_id), score in votes.items()],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['user', 'game'],
+        update_fields=['score', 'updated_at'],
+    )
+
+    game_changes: Dict[str, List[Tuple[Optional[int], int]]] = {}
+    user_deltas: Dict[int, Dict[str, int]] = {}
+    activity: Dict[str, int] = {}
+    for (user_id, game_id), new in votes.items():
+        old = previous.get((user_id, game_id))
+        game_changes.setdefault(game_id, []).append((old, new))
+        if old != new:
+            activity[game_id] = activity.get(game_id, 0) + 1
+        deltas = user_deltas.setdefault(user_id, {'vote_count': 0, 'vote_sum': 0})
+        deltas['vote_count'] += old is None
+        deltas['vote_sum'] += new - (old or 0)
+    for game_id in game_ids:
+        stats.apply_vote_changes(game_id, game_changes[game_id])
+    for user_id in user_ids:
+        stats.apply_user_change(user_id, user_deltas[user_id])
+    trending.record_activities((game_id, count, 0, 0) for game_id, count in sorted(activity.items()))
+    caching.invalidate_games(sorted(activity))
+
+    return {key: previous.get(key) for key in votes}
+
+
+def _lock_stats(game_ids: List[str]) -> set:
+    # Sorted so two writers never wait on each other in opposite orders. Games
+    # removed from their feed keep their stats row but are left out, so votes
+    # for them end up unknown.
+    return set(
+        GameStats.objects.select_for_update(of=('self',))
+        .filter(game_id__in=game_ids, game__removed_at__isnull=True)
+        .order_by('game_id')
+        .values_list('game_id', flat=True)
+    )
@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import FeedState
 
-# Register your models here.
+
+@admin.register(FeedState)
+class FeedStateAdmin(admin.ModelAdmin):
+    list_display = ('source', 'url', 'etag', 'last_modified', 'imported_at', 'checked_at')
+    readonly_fields = ('content_hash', 'imported_at', 'checked_at')
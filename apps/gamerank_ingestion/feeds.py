@@ -0,0 +1,106 @@
+"""
+The JSON game feeds and what was last imported from each.
+
+``settings.GAMERANK_FEEDS`` maps each source (also the prefix of its game
+ids) to its URL, its field layout (``FORMATS``) and whether it is enabled.
+The FreeToGame and MMOBomb APIs share one layout.
+
+``FeedState`` keeps, per source, the ``ETag`` and ``Last-Modified`` of the
+last imported response and a fingerprint of its body. ``feed_requests``
+turns them into conditional requests (see fetch.py). A feed that answers
+304, or sends the same body again, is not parsed or imported at all.
+``save_state`` is only called once a response has been imported, so a
+failed import is retried in full by the next run.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.gamerank_core.models import Game
+
+from .fetch import FeedRequest, FeedResponse
+from .models import FeedState
+
+# Feed field of each game field that is not named the same
+FORMATS: Dict[str, Dict[str, str]] = {
+    'listado2': {},
+    'freetogame': {'description': 'short_description', 'image_url': 'thumbnail'},
+}
+GAME_FIELDS = ['title', 'platform', 'genre', 'developer', 'publisher', 'description', 'image_url']
+
+
+def get_feeds() -> Dict[str, Dict[str, Any]]:
+    return getattr(settings, 'GAMERANK_FEEDS', {})
+
+
+def enabled_sources() -> List[str]:
+    return [source for source, feed in get_feeds().items() if feed.get('ENABLED')]
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def feed_requests(
+    sources: Iterable[str], urls: Optional[Dict[str, str]] = None, conditional: bool = True
+) -> List[FeedRequest]:
+    """Build the requests of the sources' feeds, conditional on their last imported response."""
+    feeds = get_feeds()
+    sources = list(sources)
+    urls = urls or {}
+    states = FeedState.objects.in_bulk(sources) if conditional else {}
+    requests = []
+    for source in sources:
+        url = urls.get(source) or feeds[source]['URL']
+        state = states.get(source)
+        if state is not None and state.url == url:
+            requests.append(FeedRequest(source, url, state.etag, state.last_modified))
+        else:
+            requests.append(FeedRequest(source, url))
+    return requests
+
+
+def is_unchanged(response: FeedResponse) -> bool:
+    """Whether the feed is the same as when it was last imported."""
+    if response.not_modified:
+        return True
+    return FeedState.objects.filter(
+        source=response.source, url=response.url, content_hash=body_hash(response.body)
+    ).exists()
+
+
+def save_state(response: FeedResponse, imported: bool) -> None:
+    """Remember a response once it has been imported (or found unchanged)."""
+    now = timezone.now()
+    defaults = {
+        'url': response.url,
+        'etag': response.etag,
+        'last_modified': response.last_modified,
+        'checked_at': now,
+    }
+    if imported:
+        defaults.update(content_hash=body_hash(response.body), imported_at=now)
+    FeedState.objects.update_or_create(source=response.source, defaults=defaults)
+
+
+def parse_feed(body: bytes) -> List[Dict[str, Any]]:
+    """Decode a feed body into its list of game entries, raising ValueError if it is not one."""
+    entries = json.loads(body)
+    if not isinstance(entries, list):
+        raise ValueError('expected a JSON list of games')
+    return entries
+
+
+def game_from_entry(source: str, entry: Dict[str, Any]) -> Game:
+    """Build the Game of a feed entry, raising KeyError, TypeError or ValueError if it is invalid."""
+    names = FORMATS[get_feeds()[source]['FORMAT']]
+    return Game(
+        id=f"{source}-{entry['id']}",
+        release_date=datetime.strptime(entry['release_date'], '%Y-%m-%d').date(),
+        source=source,
+        **{field: entry[names.get(field, field)] for field in GAME_FIELDS},
+    )
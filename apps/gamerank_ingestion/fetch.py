@@ -0,0 +1,164 @@
+"""
+Concurrent download of the JSON game feeds.
+
+``fetch_feeds`` downloads every requested feed at once over one pooled
+``httpx.AsyncClient``, so connections (and TLS sessions) are reused and a
+slow feed does not hold up the others. Requests are bounded by the
+``settings.GAMERANK_FETCH`` limits: a connect and a read timeout, a pool
+size, and a number of requests in flight per host, so that several feeds on
+one host do not hammer it.
+
+Timeouts, connection errors and the statuses in ``RETRY_STATUSES`` are
+retried with exponential backoff and jitter (tenacity), up to ``ATTEMPTS``
+tries. A feed slot is only held while a request is in flight, never while
+waiting to retry. Other errors are not retried.
+
+Each ``FeedRequest`` may carry the ``ETag`` and ``Last-Modified`` of the
+previous response of its feed. They are sent as ``If-None-Match`` and
+``If-Modified-Since``, so a feed that has not changed costs one 304 with no
+body. Keeping the validators (``FeedState``) is up to the caller, see
+feeds.py. This module does no database access, so it can run in the event
+loop.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+from django.conf import settings
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+
+DEFAULT_OPTIONS = {
+    'TIMEOUT': 30,
+    'CONNECT_TIMEOUT': 5,
+    'ATTEMPTS': 4,
+    'BACKOFF': 1,
+    'MAX_BACKOFF': 30,
+    'MAX_CONNECTIONS': 10,
+    'PER_HOST': 2,
+}
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+USER_AGENT = 'GameRank feed importer'
+
+
+class FeedRequest:
+    """A feed to download, with the validators of its previous response."""
+
+    def __init__(self, source: str, url: str, etag: str = '', last_modified: str = '') -> None:
+        self.source = source
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class FeedResponse:
+    """The outcome of downloading a feed: its body, a 304, or an error."""
+
+    def __init__(
+        self,
+        request: FeedRequest,
+        status: Optional[int] = None,
+        body: bytes = b'',
+        etag: str = '',
+        last_modified: str = '',
+        error: str = '',
+        attempts: int = 0,
+    ) -> None:
+        self.request = request
+        self.source = request.source
+        self.url = request.url
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class RetryableStatus(Exception):
+    """Raised for a response whose status is worth retrying."""
+
+    def __init__(self, response: httpx.Response) -> None:
+        super().__init__(f'HTTP {response.status_code}')
+        self.response = response
+
+
+def get_fetch_options() -> Dict[str, Any]:
+    return {**DEFAULT_OPTIONS, **getattr(settings, 'GAMERANK_FETCH', {})}
+
+
+def fetch(requests: Iterable[FeedRequest], options: Optional[Dict[str, Any]] = None) -> List[FeedResponse]:
+    """Download the feeds concurrently from synchronous code, returning their responses in order."""
+    return asyncio.run(fetch_feeds(requests, options))
+
+
+async def fetch_feeds(
+    requests: Iterable[FeedRequest], options: Optional[Dict[str, Any]] = None
+) -> List[FeedResponse]:
+    """Download the feeds concurrently over one pooled client, returning their responses in order."""
+    options = options or get_fetch_options()
+    limits = httpx.Limits(
+        max_connections=options['MAX_CONNECTIONS'],
+        max_keepalive_connections=options['MAX_CONNECTIONS'],
+    )
+    timeout = httpx.Timeout(options['TIMEOUT'], connect=options['CONNECT_TIMEOUT'])
+    per_host: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(options['PER_HOST']))
+    headers = {'User-Agent': USER_AGENT, 'Accept': 'application/json'}
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, headers=headers, follow_redirects=True) as client:
+        return await asyncio.gather(*(
+            _fetch(client, per_host[httpx.URL(request.url).host], request, options)
+            for request in requests
+        ))
+
+
+async def _fetch(
+    client: httpx.AsyncClient, slots: asyncio.Semaphore, request: FeedRequest, options: Dict[str, Any]
+) -> FeedResponse:
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(options['ATTEMPTS']),
+        wait=wait_exponential_jitter(initial=options['BACKOFF'], max=options['MAX_BACKOFF']),
+        retry=retry_if_exception_type((httpx.TransportError, RetryableStatus)),
+        reraise=True,
+    )
+    attempts = 0
+    try:
+        async for attempt in retrying:
+            with attempt:
+                attempts += 1
+                async with slots:
+                    response = await client.get(request.url, headers=request.headers())
+                if response.status_code in RETRY_STATUSES:
+                    raise RetryableStatus(response)
+    except RetryableStatus as e:
+        return FeedResponse(request, e.response.status_code, error=str(e), attempts=attempts)
+    except httpx.HTTPError as e:
+        return FeedResponse(request, error=f'{type(e).__name__}: {e}', attempts=attempts)
+
+    if response.status_code == 304:
+        # A 304 may leave out the validators, which then stay as they were
+        return FeedResponse(
+            request, 304,
+            etag=response.headers.get('ETag', request.etag),
+            last_modified=response.headers.get('Last-Modified', request.last_modified),
+            attempts=attempts,
+        )
+    if response.is_error:
+        return FeedResponse(request, response.status_code, error=f'HTTP {response.status_code}', attempts=attempts)
+    return FeedResponse(
+        request, response.status_code, response.content,
+        etag=response.headers.get('ETag', ''),
+        last_modified=response.headers.get('Last-Modified', ''),
+        attempts=attempts,
+    )
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.gamerank_ingestion.fetch import FeedRequest, FeedResponse, fetch, get_fetch_options
+
+LAST_MODIFIED = 'Sat, 17 Oct 2026 00:00:00 GMT'
+
+
+class StandInFeeds(ThreadingHTTPServer):
+    """A local HTTP server playing the feed APIs, counting what it is asked for.
+
+    ``/<name>.json?games=N&delay=S&fail=K`` serves N games after S seconds,
+    answering the first K requests with a 503. It honours ``If-None-Match``.
+    """
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.not_modified = 0
+        self.body_bytes = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failures: Dict[str, int] = {}
+
+    def url(self, name: str, **params: Any) -> str:
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        return f'http://127.0.0.1:{self.server_address[1]}/{name}.json?{query}'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        server: StandInFeeds = self.server
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            failures = server.failures.get(url.path, 0)
+            fail = failures < int(params.get('fail', 0))
+            if fail:
+                server.failures[url.path] = failures + 1
+        try:
+            time.sleep(float(params.get('delay', 0)))
+            if fail:
+                self._send(503, b'')
+                return
+            body = self._feed(url.path, int(params.get('games', 100)))
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                with server.lock:
+                    server.not_modified += 1
+                self._send(304, b'', {'ETag': etag})
+                return
+            with server.lock:
+                server.body_bytes += len(body)
+            self._send(200, body, {'ETag': etag, 'Last-Modified': LAST_MODIFIED, 'Content-Type': 'application/json'})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _feed(self, path: str, games: int) -> bytes:
+        return json.dumps([
+            {
+                'id': i, 'title': f'Game {path} {i}', 'platform': 'PC (Windows)', 'genre': 'Shooter',
+                'developer': 'Stand-in', 'publisher': 'Stand-in', 'release_date': '2024-01-01',
+                'short_description': 'A game served by the stand-in feed.',
+                'thumbnail': f'https://example.com/{i}.jpg',
+            }
+            for i in range(games)
+        ]).encode()
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark downloading the JSON feeds from a local stand-in server: one blocking request at a '
+        'time against the concurrent pooled fetcher, a conditional resync, and retries of a flaky feed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--feeds', type=int, default=6, help='Feeds to download (default: 6)')
+        parser.add_argument('--games', type=int, default=2000, help='Games per feed (default: 2000)')
+        parser.add_argument('--delay', type=float, default=0.3, help='Server latency in seconds (default: 0.3)')
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if options['feeds'] < 1 or options['games'] < 0 or options['delay'] < 0:
+            raise CommandError('--feeds must be positive and --games and --delay not negative')
+
+        server = StandInFeeds()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            self._report(server, options['feeds'], options['games'], options['delay'])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _report(self, server: StandInFeeds, feeds: int, games: int, delay: float) -> None:
+        urls = [server.url(f'feed{i}', games=games, delay=delay) for i in range(feeds)]
+        # Fast retries, so the flaky feed does not dominate the timings
+        fetch_options = {**get_fetch_options(), 'BACKOFF': 0.05, 'MAX_BACKOFF': 0.2}
+
+        def legacy() -> List[str]:
+            statuses = []
+            for url in urls:
+                response = requests.get(url)
+                statuses.append(str(response.status_code))
+            return statuses
+
+        def concurrent() -> List[FeedResponse]:
+            return fetch([FeedRequest(f'F{i}', url) for i, url in enumerate(urls)], fetch_options)
+
+        first = concurrent()
+
+        def conditional() -> List[FeedResponse]:
+            return fetch(
+                [FeedRequest(r.source, r.url, r.etag, r.last_modified) for r in first], fetch_options
+            )
+
+        def flaky() -> List[FeedResponse]:
+            url = server.url(f'flaky{time.time_ns()}', games=games, delay=delay, fail=2)
+            return fetch([FeedRequest('FLAKY', url)], fetch_options)
+
+        self.stdout.write(
+            f'{"scenario":<30}{"seconds":>9}{"requests":>10}{"304s":>6}{"body KB":>9}{"in flight":>11}  outcome'
+        )
+        cases: List[tuple] = [
+            ('blocking, one at a time', legacy),
+            ('concurrent, pooled', concurrent),
+            ('concurrent, conditional', conditional),
+            ('flaky feed (two 503s)', flaky),
+        ]
+        for label, run in cases:
+            self._run(server, label, run)
+        self.stdout.write(f'Requests in flight per host are capped at {fetch_options["PER_HOST"]} (PER_HOST).')
+
+    def _run(self, server: StandInFeeds, label: str, run: Callable[[], list]) -> None:
+        server.reset()
+        started = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - started
+        if results and isinstance(results[0], FeedResponse):
+            outcome = ', '.join(
+                r.error or f'{r.status} after {r.attempts} attempt{"s" if r.attempts > 1 else ""}'
+                for r in results[:2]
+            )
+        else:
+            outcome = ', '.join(results[:2])
+        self.stdout.write(
+            f'{label:<30}{elapsed:>9.2f}{server.requests:>10}{server.not_modified:>6}'
+            f'{server.body_bytes / 1024:>9.0f}{server.max_in_flight:>11}  {outcome}'
+        )
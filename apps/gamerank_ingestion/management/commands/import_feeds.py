@@ -0,0 +1,121 @@
+from typing import Any, Dict, Iterator, List
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.gamerank_core.models import Game
+from apps.gamerank_core.recommendations import refresh_content_neighbours
+from apps.gamerank_ingestion.feeds import (
+    enabled_sources, feed_requests, game_from_entry, get_feeds, is_unchanged, parse_feed, save_state,
+)
+from apps.gamerank_ingestion.fetch import FeedRequest, fetch
+from apps.gamerank_ingestion.upsert import DEFAULT_BATCH_SIZE, GameImport
+
+# Larger imports leave the similar games to `build_recommendations --kind content`
+MAX_SIMILAR_REFRESH = 10_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Download the enabled JSON game feeds (settings.GAMERANK_FEEDS) concurrently and import them. '
+        'Feeds unchanged since their last import are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            action='append',
+            choices=sorted(get_feeds()),
+            help='Import this feed, even if it is not enabled (repeatable; default: the enabled feeds)'
+        )
+        self.add_import_arguments(parser)
+
+    def add_import_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Download and import the feeds even if they have not changed'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Games written and committed per batch (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Mark games of a source that are no longer in its feed as removed'
+        )
+        parser.add_argument(
+            '--skip-similar',
+            action='store_true',
+            help='Do not refresh the similar games of imported titles'
+        )
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        sources = options['source'] or enabled_sources()
+        if not sources:
+            raise CommandError('No feeds are enabled; see GAMERANK_FEEDS and pass --source to import one anyway.')
+        self.import_feeds(feed_requests(sources, conditional=not options['force']), options)
+
+    def import_feeds(self, requests: List[FeedRequest], options: Dict[str, Any]) -> None:
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        self.stdout.write(f'Fetching {", ".join(request.url for request in requests)}...')
+
+        touched = []
+        failed_feeds = 0
+        for response in fetch(requests):
+            source = response.source
+            if response.error:
+                self.stderr.write(self.style.ERROR(
+                    f'{source}: error fetching {response.url} after {response.attempts} attempts ({response.error})'
+                ))
+                failed_feeds += 1
+                continue
+            if not options['force'] and is_unchanged(response):
+                save_state(response, imported=False)
+                self.stdout.write(f'{source}: not modified since the last import.')
+                continue
+            try:
+                entries = parse_feed(response.body)
+            except ValueError as e:
+                self.stderr.write(self.style.ERROR(f'{source}: invalid JSON response from {response.url} ({e})'))
+                failed_feeds += 1
+                continue
+
+            job = GameImport(source, options['batch_size'], prune=options['prune'], max_touched=MAX_SIMILAR_REFRESH)
+            try:
+                for failed in job.run(self._read_games(source, entries, job)):
+                    for game_id, error in failed:
+                        self.stderr.write(self.style.WARNING(f"Error saving game ID '{game_id}': {error}"))
+                if options['prune']:
+                    job.prune()
+            finally:
+                job.finish()
+            save_state(response, imported=True)
+            self.stdout.write(self.style.SUCCESS(f'{source}: {job.report()}'))
+            if len(touched) <= MAX_SIMILAR_REFRESH:
+                touched += job.touched
+
+        if touched and not options['skip_similar']:
+            if len(touched) > MAX_SIMILAR_REFRESH:
+                self.stdout.write('Too many games to refresh similar games now; run `build_recommendations --kind content`.')
+            else:
+                try:
+                    refreshed = refresh_content_neighbours(touched)
+                except ImportError as e:
+                    self.stderr.write(self.style.WARNING(f'Similar games not refreshed: {str(e)}'))
+                else:
+                    self.stdout.write(f'Refreshed {refreshed} similar game entries.')
+
+        if failed_feeds:
+            raise CommandError(f'{failed_feeds} of {len(requests)} feeds could not be imported.')
+
+    def _read_games(self, source: str, entries: List[Any], job: GameImport) -> Iterator[Game]:
+        for entry in entries:
+            try:
+                yield game_from_entry(source, entry)
+            except (KeyError, TypeError, ValueError) as e:
+                self.stderr.write(self.style.WARNING(f'Error processing game: {str(e)}'))
+                entry_id = entry.get('id') if isinstance(entry, dict) else None
+                job.skip(f'{source}-{entry_id}' if entry_id is not None else None)
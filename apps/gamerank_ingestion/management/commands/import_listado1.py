@@ -1,9 +1,14 @@
 import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import Optional, Dict, Any
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from typing import Optional, Dict, Any, Iterator
+from django.core.management.base import BaseCommand, CommandError
 from apps.gamerank_core.models import Game
+from apps.gamerank_core.recommendations import refresh_content_neighbours
+from apps.gamerank_ingestion.upsert import DEFAULT_BATCH_SIZE, GameImport
+
+PROGRESS_EVERY = 100_000
+# Larger imports leave the similar games to `build_recommendations --kind content`
+MAX_SIMILAR_REFRESH = 10_000
 
 
 class Command(BaseCommand):
@@ -16,68 +21,102 @@ class Command(BaseCommand):
             default='listado1.xml',
             help='Path to the XML file (default: listado1.xml)'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Games written and committed per batch (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--skip-similar',
+            action='store_true',
+            help='Do not refresh the similar games of imported titles'
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Mark games of this source that are no longer in the file as removed'
+        )
 
     def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
         file_path = options['file']
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
         self.stdout.write(f'Importing games from {file_path}...')
 
+        self.job = job = GameImport(
+            'LIS1', options['batch_size'], prune=options['prune'], max_touched=MAX_SIMILAR_REFRESH
+        )
+        next_progress = PROGRESS_EVERY
+
+        # Each batch commits on its own, so an error part way keeps the batches before it
         try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
+            for failed in job.run(self._read_games(file_path)):
+                for game_id, error in failed:
+                    self.stderr.write(self.style.WARNING(f"Error saving game ID '{game_id}': {error}"))
+                if job.processed >= next_progress:
+                    self.stdout.write(job.report())
+                    next_progress += PROGRESS_EVERY
         except FileNotFoundError:
             self.stderr.write(self.style.ERROR(f'File not found: {file_path}'))
             return
-        except ET.ParseError:
-            self.stderr.write(self.style.ERROR(f'Invalid XML file: {file_path}'))
-            return
+        except ET.ParseError as e:
+            self.stderr.write(self.style.ERROR(f'Invalid XML file: {file_path} ({e})'))
+            if options['prune']:
+                self.stderr.write(self.style.WARNING('Not removing missing games: the file was not read completely.'))
+            if not job.processed:
+                return
+        else:
+            if options['prune']:
+                job.prune()
+        finally:
+            job.finish()
 
-        games_created = 0
-        games_updated = 0
-        games_skipped = 0
+        self.stdout.write(self.style.SUCCESS(f'Imported games: {job.report()}'))
 
-        with transaction.atomic():
-            for game_elem in root.findall('.//game'):
-                game_data = self._parse_game_element(game_elem)
-                
-                if game_data is None:
-                    games_skipped += 1
-                    continue # Skip this game if parsing failed
-                    
-                game_id = f"LIS1-{game_data['id']}"
-                
-                try:
-                    game, created = Game.objects.update_or_create(
-                        id=game_id,
-                        defaults={
-                            'title': game_data['title'],
-                            'platform': game_data['platform'],
-                            'genre': game_data['genre'],
-                            'developer': game_data['developer'],
-                            'publisher': game_data['publisher'],
-                            'release_date': game_data['release_date'],
-                            'description': game_data['description'],
-                            'image_url': game_data['image_url'],
-                            'source': 'LIS1',
-                        }
-                    )
+        if job.touched and not options['skip_similar']:
+            if len(job.touched) > MAX_SIMILAR_REFRESH:
+                self.stdout.write('Too many games to refresh similar games now; run `build_recommendations --kind content`.')
+                return
+            try:
+                refreshed = refresh_content_neighbours(job.touched)
+            except ImportError as e:
+                self.stderr.write(self.style.WARNING(f'Similar games not refreshed: {str(e)}'))
+            else:
+                self.stdout.write(f'Refreshed {refreshed} similar game entries.')
 
-                    if created:
-                        games_created += 1
-                    else:
-                        games_updated += 1
-
-                except Exception as e: # Catch potential DB errors too
-                    self.stderr.write(
-                        self.style.WARNING(f"Error saving game ID '{game_id}': {str(e)}")
-                    )
-                    games_skipped += 1
-                    continue
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f'Successfully imported {games_created} new games, updated {games_updated} existing games, and skipped {games_skipped} games.'
+    def _read_games(self, file_path: str) -> Iterator[Game]:
+        """Stream the games of the XML file, discarding each element once it is parsed."""
+        parents = []
+        for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+            if event == 'start':
+                parents.append(elem)
+                continue
+            parents.pop()
+            if elem.tag != 'game':
+                continue
+            game_data = self._parse_game_element(elem)
+            game_id = elem.findtext('id')
+            # Detach the parsed game so the tree never grows past one element
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+            if game_data is None:
+                # A game the file still lists is not pruned because one of its fields is bad
+                self.job.skip(f'LIS1-{game_id}' if game_id else None)
+                continue # Skip this game if parsing failed
+            yield Game(
+                id=f"LIS1-{game_data['id']}",
+                title=game_data['title'],
+                platform=game_data['platform'],
+                genre=game_data['genre'],
+                developer=game_data['developer'],
+                publisher=game_data['publisher'],
+                release_date=game_data['release_date'],
+                description=game_data['description'],
+                image_url=game_data['image_url'],
+                source='LIS1',
             )
-        )
 
     def _parse_game_element(self, game_elem: ET.Element) -> Optional[Dict[str, Any]]:
         """Parse a game element from the XML file, returning None if required fields are missing."""
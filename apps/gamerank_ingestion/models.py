@@ -1,3 +1,19 @@
 from django.db import models
 
-# Create your models here.
+
+class FeedState(models.Model):
+    """What was last imported from a JSON feed, for conditional requests (see feeds.py)."""
+    source = models.CharField(max_length=50, primary_key=True)
+    url = models.URLField(max_length=500)
+    etag = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    # Fingerprint of the last imported body, for feeds that send no validators
+    content_hash = models.CharField(max_length=32, blank=True)
+    imported_at = models.DateTimeField(null=True, blank=True)
+    checked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['source']
+
+    def __str__(self) -> str:
+        return f"{self.source} ({self.url})"
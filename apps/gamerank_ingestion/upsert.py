@@ -0,0 +1,296 @@
+"""
+Incremental, batched game upserts for the ingestion commands.
+
+Every imported game stores ``content_hash``, a fingerprint of its imported
+fields (whitespace-normalized). Each batch loads the stored fingerprints of
+its ids in one query and writes only the games that are new, changed or
+coming back after a removal. An unchanged row is never rewritten, so its
+``updated_at``, cached pages and stats version stay as they are, and a resync
+of an unchanged feed writes nothing. Rows imported before fingerprints were
+stored have an empty hash, so the first import after upgrading rewrites each
+game once.
+
+The writes of a batch are one ``INSERT ... ON CONFLICT (id) DO UPDATE`` in
+its own transaction, so a failed batch only rolls back itself and memory use
+is bounded by the batch size. If a batch fails (e.g. a value too long for its
+column), its games are retried one by one so that only the bad rows are
+skipped.
+
+``bulk_create`` sends no signals, so each batch also does the work the Game
+signals would do for a single save. New games get their empty stats rows.
+Changed games get their stats version bumped and their cached pages
+invalidated. ``GameImport.finish`` then rebuilds the facet counts once and
+invalidates the game list, if anything was written. The search index needs
+nothing: it is kept in sync by the database (see gamerank_core.search).
+
+With ``prune``, ``GameImport`` writes the ids in the feed to a temporary
+table (``SeenIds``), a batch at a time, so memory stays bounded by the batch
+size whatever the feed size. Afterwards it soft-deletes the source's games
+the table does not list, by setting ``removed_at`` (see ``Game.objects``).
+Their votes and comments are kept, and a removed game that reappears in a
+later feed is restored.
+"""
+import hashlib
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.db import DatabaseError, connection, reset_queries, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.gamerank_core import caching, facets
+from apps.gamerank_core.models import Game, GameStats
+from apps.gamerank_core.ranking import rank_value
+
+DEFAULT_BATCH_SIZE = 2000
+# The fields a feed provides, in fingerprint order
+HASHED_FIELDS = [
+    'title', 'platform', 'genre', 'developer', 'publisher', 'release_date',
+    'description', 'image_url', 'source',
+]
+# Everything an import may change; created_at keeps the first import's time
+UPDATE_FIELDS = HASHED_FIELDS + ['content_hash', 'removed_at', 'updated_at']
+
+
+def content_hash(game: Game) -> str:
+    """Fingerprint a game's imported fields, ignoring differences in whitespace."""
+    values = (' '.join(str(getattr(game, field) or '').split()) for field in HASHED_FIELDS)
+    return hashlib.blake2b('\x1f'.join(values).encode(), digest_size=16).hexdigest()
+
+
+def batched(games: Iterable, batch_size: int) -> Iterator[List]:
+    iterator = iter(games)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def upsert_games(
+    games: Iterable[Game], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[Tuple[List[str], List[str], int, List[Tuple[str, str]]]]:
+    """Insert new games and update changed ones, in batches.
+
+    Yields the created ids, changed ids, number of unchanged games and
+    (id, error) failures of each batch once it is committed.
+    """
+    for batch in batched(games, batch_size):
+        failed = []
+        try:
+            created, changed, unchanged = upsert_batch(batch)
+        except DatabaseError:
+            created, changed, unchanged = [], [], 0
+            for game in batch:
+                try:
+                    one_created, one_changed, one_unchanged = upsert_batch([game])
+                except DatabaseError as e:
+                    failed.append((game.pk, str(e)))
+                else:
+                    created += one_created
+                    changed += one_changed
+                    unchanged += one_unchanged
+        # With DEBUG on, Django would keep the SQL of the last 9000 queries
+        reset_queries()
+        yield created, changed, unchanged, failed
+
+
+def upsert_batch(games: List[Game]) -> Tuple[List[str], List[str], int]:
+    """Write the new and changed games of one batch in a transaction.
+
+    Returns the created ids, the changed ids and the number of unchanged games.
+    """
+    # A row may only be upserted once per statement; the last one in the feed wins
+    by_id = {game.pk: game for game in games}
+    for game in by_id.values():
+        game.content_hash = content_hash(game)
+    with transaction.atomic():
+        stored = {
+            pk: (fingerprint, removed_at is None)
+            for pk, fingerprint, removed_at in Game.all_objects.filter(pk__in=list(by_id))
+            .values_list('pk', 'content_hash', 'removed_at')
+        }
+        created = [game_id for game_id in by_id if game_id not in stored]
+        # A removed game that is back in the feed is written to restore it
+        changed = [
+            game_id for game_id, game in by_id.items()
+            if game_id in stored and stored[game_id] != (game.content_hash, True)
+        ]
+        if created or changed:
+            Game.all_objects.bulk_create(
+                [by_id[game_id] for game_id in created + changed],
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=UPDATE_FIELDS,
+            )
+        if created:
+            empty_rank = rank_value(0, 0)
+            GameStats.objects.bulk_create(
+                [GameStats(game_id=game_id, rank_score=empty_rank) for game_id in created],
+                ignore_conflicts=True,
+            )
+        if changed:
+            GameStats.objects.filter(game_id__in=changed).update(version=F('version') + 1)
+            caching.invalidate_games(changed, listing=False)
+    return created, changed, len(by_id) - len(created) - len(changed)
+
+
+def remove_games(game_ids: List[str]) -> None:
+    """Soft-delete games in a transaction, as an import with ``prune`` does."""
+    now = timezone.now()
+    with transaction.atomic():
+        Game.objects.filter(pk__in=game_ids).update(removed_at=now, updated_at=now)
+        GameStats.objects.filter(game_id__in=game_ids).update(version=F('version') + 1)
+        caching.invalidate_games(game_ids, listing=False)
+
+
+class SeenIds:
+    """The game ids read from a feed, kept in a temporary table of the import's connection."""
+
+    table = 'gamerank_import_seen'
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._created = False
+
+    def add(self, game_ids: List[str]) -> None:
+        if not game_ids:
+            return
+        table = connection.ops.quote_name(self.table)
+        with connection.cursor() as cursor:
+            if not self._created:
+                # Left over if an earlier import on this connection did not finish
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+                max_length = Game._meta.pk.max_length
+                cursor.execute(f'CREATE TEMPORARY TABLE {table} (id varchar({max_length}) PRIMARY KEY)')
+                self._created = True
+            for start in range(0, len(game_ids), 500):
+                batch = game_ids[start:start + 500]
+                cursor.execute(
+                    f'INSERT INTO {table} (id) VALUES {", ".join(["(%s)"] * len(batch))} ON CONFLICT DO NOTHING',
+                    batch,
+                )
+        self.count += len(game_ids)
+
+    def missing(self, source: str, after: str, limit: int) -> List[str]:
+        """Get the next active game ids of the source, in id order, that were not seen."""
+        if not self._created:
+            return []
+        table = connection.ops.quote_name(self.table)
+        games = connection.ops.quote_name(Game._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT g.id FROM {games} g '
+                f'WHERE g.source = %s AND g.removed_at IS NULL AND g.id > %s '
+                f'AND NOT EXISTS (SELECT 1 FROM {table} s WHERE s.id = g.id) '
+                f'ORDER BY g.id LIMIT %s',
+                [source, after, limit],
+            )
+            return [game_id for game_id, in cursor.fetchall()]
+
+    def drop(self) -> None:
+        if self._created:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {connection.ops.quote_name(self.table)}')
+            self._created = False
+
+
+def finish_import() -> None:
+    """Bring the facet counts and the cached game list up to date after an import."""
+    facets.rebuild_facet_counts()
+    caching.invalidate('games')
+
+
+class GameImport:
+    """One import of a source's feed: runs the upserts and keeps the delta counts for the report."""
+
+    def __init__(
+        self,
+        source: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        prune: bool = False,
+        max_touched: Optional[int] = None,
+    ) -> None:
+        self.source = source
+        self.batch_size = batch_size
+        self.max_touched = max_touched
+        self.created = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.skipped = 0
+        # Created and changed ids, for refreshing similar games; stops growing past max_touched
+        self.touched: List[str] = []
+        # Every id in the feed, only needed (and kept) when pruning; written
+        # to the database after each batch, so only one batch is held here
+        self.seen: Optional[SeenIds] = SeenIds() if prune else None
+        self._unrecorded: List[str] = []
+        self.started = time.perf_counter()
+
+    @property
+    def processed(self) -> int:
+        return self.created + self.changed + self.unchanged
+
+    @property
+    def written(self) -> int:
+        return self.created + self.changed + self.removed
+
+    def run(self, games: Iterable[Game]) -> Iterator[List[Tuple[str, str]]]:
+        """Upsert the games of the feed, yielding the (id, error) failures of each committed batch."""
+        for created, changed, unchanged, failed in upsert_games(self._track(games), self.batch_size):
+            self.created += len(created)
+            self.changed += len(changed)
+            self.unchanged += unchanged
+            self.skipped += len(failed)
+            if self.max_touched is None or len(self.touched) <= self.max_touched:
+                self.touched += created + changed
+            self._record_seen()
+            yield failed
+
+    def skip(self, game_id: Optional[str] = None) -> None:
+        """Count a feed entry that could not be parsed; its game, if known, is not pruned."""
+        self.skipped += 1
+        if game_id and self.seen is not None:
+            self._unrecorded.append(game_id)
+
+    def prune(self, chunk_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Soft-delete the source's games that were not in the feed, returning how many.
+
+        Only call this once the whole feed has been read. A feed without any
+        games removes nothing, so an empty download cannot empty the catalog.
+        """
+        if self.seen is None:
+            return 0
+        self._record_seen()
+        if not self.seen.count:
+            return 0
+        last_id = ''
+        while missing := self.seen.missing(self.source, last_id, chunk_size):
+            remove_games(missing)
+            self.removed += len(missing)
+            last_id = missing[-1]
+        return self.removed
+
+    def finish(self) -> None:
+        """Update the facet counts and the game list, unless the import wrote nothing."""
+        if self.seen is not None:
+            self.seen.drop()
+        if self.written:
+            finish_import()
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        return (
+            f'{self.created} created, {self.changed} changed, {self.unchanged} unchanged, '
+            f'{self.removed} removed, {self.skipped} skipped '
+            f'in {elapsed:.1f}s ({self.processed / max(elapsed, 1e-9):.0f} rows/s).'
+        )
+
+    def _track(self, games: Iterable[Game]) -> Iterator[Game]:
+        for game in games:
+            if self.seen is not None:
+                self._unrecorded.append(game.pk)
+            yield game
+
+    def _record_seen(self) -> None:
+        if self.seen is not None:
+            self.seen.add(self._unrecorded)
+            self._unrecorded = []
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from .forms import SitePasswordForm
 from .models import SitePassword, UserProfile
 
 
@@ -13,7 +14,19 @@ class UserProfileInline(admin.StackedInline):
 
 class CustomUserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
-    list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff')
+    list_display = (
+        'username',
+        'email',
+        'first_name',
+        'last_name',
+        'is_staff',
+        'votes_count',
+        'average_score',
+        'follows_count',
+        'comments_count',
+    )
+    # Activity counters come from the joined UserStats row
+    list_select_related = ('stats',)
 
     def get_inline_instances(self, request, obj=None):
         if not obj:
@@ -23,7 +36,9 @@ class CustomUserAdmin(BaseUserAdmin):
 
 @admin.register(SitePassword)
 class SitePasswordAdmin(admin.ModelAdmin):
-    list_display = ('value', 'created_at', 'updated_at')
+    # Only the hash is stored; the form sets it from a new password
+    form = SitePasswordForm
+    list_display = ('__str__', 'created_at', 'updated_at')
     readonly_fields = ('created_at', 'updated_at')
 
 
@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from .authtoken import RequestAuth
+
+
+def auth_state(request):
+    """Expose ``signed_in`` and the user's display settings (``profile_settings``) to templates.
+
+    Both come from the auth token when it is valid, so the base layout costs
+    no session, user or profile query.
+    """
+    auth = getattr(request, 'auth', None) or RequestAuth(request, None)
+    return {
+        'signed_in': SimpleLazyObject(lambda: auth.signed_in),
+        'profile_settings': SimpleLazyObject(lambda: auth.profile_settings),
+    }
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth import authenticate
 from .models import SitePassword, UserProfile
+from .sitepassword import check_site_password
 
 class LoginForm(forms.Form):
     username = forms.CharField()
@@ -15,7 +16,7 @@ class LoginForm(forms.Form):
 
         # Check site password first
         if site_password:
-            if not SitePassword.objects.filter(value=site_password).exists():
+            if not check_site_password(site_password):
                 self.add_error('site_password', "Incorrect site password.")
                 # No need to check user credentials if site password fails
                 return cleaned_data 
@@ -41,4 +42,16 @@ class UserSettingsForm(forms.ModelForm):
     class Meta:
         model = UserProfile
         fields = ['alias', 'font_family', 'font_size']
-        # Add widgets or choices later if needed 
\ No newline at end of file
+        # Add widgets or choices later if needed 
+
+class SitePasswordForm(forms.ModelForm):
+    """Admin form taking the site password in plaintext and storing its hash."""
+    password = forms.CharField(widget=forms.PasswordInput(render_value=False), label="New site password")
+
+    class Meta:
+        model = SitePassword
+        fields = []
+
+    def save(self, commit=True):
+        self.instance.set_password(self.cleaned_data['password'])
+        return super().save(commit)
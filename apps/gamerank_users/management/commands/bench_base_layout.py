@@ -0,0 +1,106 @@
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.template import Engine, RequestContext, engines
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+# A page with no content of its own, so the timings are the layout's
+PAGE = 'bench/page.html'
+LOADERS = [
+    ('django.template.loaders.locmem.Loader', {
+        PAGE: "{% extends '_base.html' %}{% block content %}<p>Benchmark page</p>{% endblock %}",
+    }),
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rendering the base layout (navbar, fonts) per request, with and without the template cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help='Renders timed per case (default: 200)')
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive')
+
+        with transaction.atomic():
+            user = User.objects.create(username='bench-layout-user', password='!')
+            user.profile.alias = 'Bench Layout'
+            user.profile.save()
+            self._report(user, options['repeat'])
+            transaction.set_rollback(True)
+
+    def _report(self, user: User, repeat: int) -> None:
+        self.stdout.write(f'{"loader":<10}{"viewer":<28}{"median ms":>12}{"queries":>10}')
+        cases = (
+            ('uncached', self._engine(LOADERS)),
+            ('cached', self._engine([('django.template.loaders.cached.Loader', LOADERS)])),
+        )
+        for loader, engine in cases:
+            for viewer, make_request in self._viewers(user):
+                def render() -> None:
+                    # Load the page as a view would, so the uncached loader parses it every time
+                    engine.get_template(PAGE).render(RequestContext(make_request()))
+                timings, queries = self._time(render, repeat)
+                self.stdout.write(f'{loader:<10}{viewer:<28}{statistics.median(timings):>12.3f}{queries:>10}')
+
+    def _engine(self, loaders: list) -> Engine:
+        configured = engines['django'].engine
+        return Engine(
+            dirs=configured.dirs,
+            loaders=loaders,
+            context_processors=configured.context_processors,
+            libraries=configured.libraries,
+        )
+
+    def _viewers(self, user: User) -> List[Tuple[str, Callable]]:
+        factory = RequestFactory()
+
+        def anonymous():
+            request = factory.get('/')
+            request.user = AnonymousUser()
+            request.session = {}
+            return request
+
+        def signed_in(new_session: bool) -> Callable:
+            session = _session(user)
+
+            def make():
+                request = factory.get('/')
+                # A fresh user object per request, as the auth middleware loads one
+                request.user = User(pk=user.pk, username=user.username)
+                request.session = _session(user) if new_session else session
+                return request
+            return make
+
+        return [
+            ('anonymous', anonymous),
+            # The first page of a session reads the profile once...
+            ('signed in, first page', signed_in(new_session=True)),
+            # ...later pages find the settings in the session
+            ('signed in, later pages', signed_in(new_session=False)),
+        ]
+
+    def _time(self, func: Callable[[], Any], repeat: int) -> Tuple[List[float], int]:
+        func()  # Warm up (the cached loader parses on first use)
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(captured)
+        return timings, queries
+
+
+def _session(user: User) -> Dict[str, Any]:
+    return {'auth': True, SESSION_KEY: str(user.pk)}
@@ -0,0 +1,101 @@
+import logging
+import statistics
+import time
+from typing import Any, Callable, Dict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.gamerank_users.models import SitePassword
+
+SITE_PASSWORD = 'bench-site-password'
+USER_PASSWORD = 'bench-user-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the login endpoint under a password guessing flood, with and without throttling. '
+        'Reports throughput, median latency of handled and rejected attempts, and queries per attempt.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=100, help='Login attempts per scenario (default: 100)')
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if options['attempts'] < 1:
+            raise CommandError('--attempts must be positive')
+
+        # The test client talks to the app in-process, as host 'testserver'
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            site_password = SitePassword()
+            site_password.set_password(SITE_PASSWORD)
+            site_password.save()
+            User.objects.create_user(username='bench-login-user', password=USER_PASSWORD)
+            self._report(options['attempts'])
+            transaction.set_rollback(True)
+
+    def _report(self, attempts: int) -> None:
+        client = Client()
+        url = reverse('gamerank_users:login')
+        # Each run uses its own addresses and usernames, so buckets left by earlier runs do not interfere
+        run = int(time.time())
+
+        def guess_site_password(i: int) -> Dict[str, Any]:
+            return {'REMOTE_ADDR': '198.51.100.1', 'data': {
+                'username': f'victim-{run}', 'password': 'x', 'site_password': f'guess-{run}-{i}',
+            }}
+
+        def stuff_credentials(i: int) -> Dict[str, Any]:
+            # A botnet: every attempt from another address, all against one account
+            return {'REMOTE_ADDR': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}', 'data': {
+                'username': f'victim-{run}', 'password': f'guess-{i}', 'site_password': SITE_PASSWORD,
+            }}
+
+        self.stdout.write(
+            f'{"scenario":<34}{"attempts/s":>12}{"rejected":>10}{"ms handled":>12}{"ms rejected":>13}{"queries":>9}'
+        )
+        scenarios = (
+            ('site password flood, no throttle', {}, guess_site_password),
+            ('site password flood, throttled', None, guess_site_password),
+            ('credential stuffing, throttled', None, stuff_credentials),
+        )
+        for label, limits, make_attempt in scenarios:
+            overrides = {} if limits is None else {'LOGIN_THROTTLE': limits}
+            with override_settings(**overrides):
+                self._run(label, client, url, attempts, make_attempt)
+            run += 1
+
+        # The real user, from their own address, still gets in during the flood
+        started = time.perf_counter()
+        response = client.post(url, {
+            'username': 'bench-login-user', 'password': USER_PASSWORD, 'site_password': SITE_PASSWORD,
+        }, REMOTE_ADDR='192.0.2.10')
+        outcome = 'signed in' if response.status_code == 302 else f'failed ({response.status_code})'
+        self.stdout.write(f'Legitimate login during the flood: {outcome} in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+    def _run(self, label: str, client: Client, url: str, attempts: int, make_attempt: Callable) -> None:
+        timings: Dict[bool, list] = {True: [], False: []}
+        # Every rejection would otherwise log a warning
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            for i in range(attempts):
+                attempt = make_attempt(i)
+                attempt_started = time.perf_counter()
+                response = client.post(url, attempt['data'], REMOTE_ADDR=attempt['REMOTE_ADDR'])
+                timings[response.status_code == 429].append((time.perf_counter() - attempt_started) * 1000)
+            elapsed = time.perf_counter() - started
+        request_logger.setLevel(level)
+
+        def median(values: list) -> str:
+            return f'{statistics.median(values):.1f}' if values else '-'
+        self.stdout.write(
+            f'{label:<34}{attempts / elapsed:>12.1f}{len(timings[True]):>10}'
+            f'{median(timings[False]):>12}{median(timings[True]):>13}{len(captured) / attempts:>9.2f}'
+        )
@@ -0,0 +1,114 @@
+import statistics
+import time
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.gamerank_users.authtoken import TOKEN_COOKIE_NAME, make_token
+from apps.gamerank_users.middleware import CustomAuthMiddleware
+from apps.gamerank_users.profiles import get_profile_settings
+
+
+class LegacyCustomAuthMiddleware(CustomAuthMiddleware):
+    """The middleware as it was before the token: URLs reversed and the session read on every request."""
+
+    def __call__(self, request):
+        login_url = reverse('gamerank_users:login')
+        public_paths = [reverse('gamerank_core:home'), login_url, '/static/', '/admin/']
+        is_public_path = any(request.path.startswith(path) for path in public_paths)
+        if not is_public_path and not request.session.get('auth'):
+            return redirect(f'{login_url}?next={request.path}')
+        return self.get_response(request)
+
+
+def layout_view(request) -> HttpResponse:
+    """Read what the base layout shows about the visitor, as every page does."""
+    auth = getattr(request, 'auth', None)
+    if auth is None:
+        signed_in = bool(request.session.get('auth'))
+        user_id = request.user.pk
+        profile = get_profile_settings(request)
+    else:
+        signed_in, user_id, profile = auth.signed_in, auth.user_id, auth.profile_settings
+    return HttpResponse(f'{signed_in}:{user_id}:{profile["display_name"]}')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-request overhead of the session, auth and site login middleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=500, help='Requests timed per case (default: 500)')
+
+    def handle(self, *args: tuple, **options: Dict[str, Any]) -> None:
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive')
+
+        with transaction.atomic():
+            user = User.objects.create(username='bench-middleware-user', password='!')
+            self._report(user, options['repeat'])
+            transaction.set_rollback(True)
+
+    def _report(self, user: User, repeat: int) -> None:
+        session_key = self._session(user)
+        factory = RequestFactory()
+        # A page that requires signing in, so the login check is exercised
+        path = reverse('gamerank_users:user_votes')
+
+        def request_with(cookies: Dict[str, str]) -> Callable:
+            def make():
+                factory.cookies.clear()
+                for name, value in cookies.items():
+                    factory.cookies[name] = value
+                return factory.get(path)
+            return make
+
+        session_cookie = {settings.SESSION_COOKIE_NAME: session_key}
+        token = make_token(user.pk, {'display_name': user.username, 'font_family': 'Arial', 'font_size': 'medium'})
+        cases: List[Tuple[str, Callable, Callable]] = [
+            ('legacy, session', self._stack(LegacyCustomAuthMiddleware), request_with(session_cookie)),
+            ('session (no token)', self._stack(CustomAuthMiddleware), request_with(session_cookie)),
+            ('token', self._stack(CustomAuthMiddleware), request_with({**session_cookie, TOKEN_COOKIE_NAME: token})),
+        ]
+
+        self.stdout.write(f'{"middleware":<22}{"median ms":>12}{"queries":>10}')
+        with override_settings(ENABLE_AUTH_TOKEN=True):
+            for label, handler, make_request in cases:
+                timings, queries = self._time(lambda: handler(make_request()), repeat)
+                self.stdout.write(f'{label:<22}{statistics.median(timings):>12.3f}{queries:>10}')
+
+    def _stack(self, auth_middleware: type) -> Callable:
+        # Outermost first, as in settings.MIDDLEWARE
+        return SessionMiddleware(AuthenticationMiddleware(auth_middleware(layout_view)))
+
+    def _session(self, user: User) -> str:
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store['auth'] = True
+        store.save()
+        return store.session_key
+
+    def _time(self, func: Callable[[], Any], repeat: int) -> Tuple[List[float], int]:
+        func()  # Warm up
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(captured)
+        return timings, queries
@@ -1,32 +1,61 @@
+import re
 from django.shortcuts import redirect
 from django.urls import reverse
-from typing import Optional, Callable
+from typing import Callable
 from django.http import HttpRequest, HttpResponse
 
+from .authtoken import RequestAuth, read_token, sync_token, token_enabled
+
+# Pages anyone may see. The API endpoints check authentication themselves
+# and answer 401/403 instead of redirecting to the login page.
+PUBLIC_URL_NAMES = [
+    'gamerank_core:home',
+    'gamerank_core:search',
+    'gamerank_core:search_json',
+    'gamerank_core:games_json',
+    'gamerank_core:bulk_votes',
+    'gamerank_users:login',
+    'gamerank_users:logout',
+]
+PUBLIC_PATH_PREFIXES = [
+    '/static/',
+    '/admin/', # Allow access to admin
+    '/trending/',
+    '/game/', # Game pages; their actions require login themselves
+    '/export/',
+]
+
+
+def public_path_matcher() -> Callable[[str], bool]:
+    """Compile the public URLs into one regex, matching whole paths for named URLs and prefixes otherwise."""
+    exact = [re.escape(reverse(name)) + r'\Z' for name in PUBLIC_URL_NAMES]
+    prefixes = [re.escape(prefix) for prefix in PUBLIC_PATH_PREFIXES]
+    pattern = re.compile('|'.join(exact + prefixes))
+    return lambda path: pattern.match(path) is not None
+
 
 class CustomAuthMiddleware:
-    """Middleware to handle custom password-based authentication."""
+    """Middleware to handle custom password-based authentication.
+
+    Sets ``request.auth`` (see authtoken.RequestAuth), which answers from the
+    signed auth token without loading the session or the user when it can.
+    """
 
     def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
         self.get_response = get_response
+        # Built once per process instead of reversing URLs on every request
+        self.login_url = reverse('gamerank_users:login') # Use namespaced URL
+        self.is_public_path = public_path_matcher()
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
-        # Define public URLs inside the call method
-        login_url = reverse('gamerank_users:login') # Use namespaced URL
-        public_paths = [
-            reverse('gamerank_core:home'), # Use namespaced URL
-            login_url,
-            '/static/',
-            '/admin/', # Allow access to admin
-            # Add other public paths like /media/ if needed
-        ]
-
-        # Check if the current path starts with any public path
-        is_public_path = any(request.path.startswith(path) for path in public_paths)
-        
-        # If path is not public and user is not authenticated via session
-        if not is_public_path and not request.session.get('auth'):
+        request.auth = RequestAuth(request, read_token(request))
+
+        # If path is not public and user is not authenticated via token or session
+        if not self.is_public_path(request.path) and not request.auth.signed_in:
             # Redirect to login, passing the current path as next parameter
-            return redirect(f'{login_url}?next={request.path}')
+            return redirect(f'{self.login_url}?next={request.path}')
 
-        return self.get_response(request) 
\ No newline at end of file
+        response = self.get_response(request)
+        if token_enabled():
+            sync_token(request, response)
+        return response
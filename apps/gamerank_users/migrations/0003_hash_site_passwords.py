@@ -0,0 +1,30 @@
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import migrations, models
+
+
+def hash_site_passwords(apps, schema_editor):
+    SitePassword = apps.get_model('gamerank_users', 'SitePassword')
+    for site_password in SitePassword.objects.all():
+        try:
+            identify_hasher(site_password.value)
+        except ValueError:
+            # Stored in plaintext before this migration
+            site_password.value = make_password(site_password.value)
+            site_password.save(update_fields=['value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamerank_users', '0002_create_sitepassword'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sitepassword',
+            name='value',
+            field=models.CharField(help_text='Password hash; use set_password().', max_length=128, unique=True),
+        ),
+        # Hashes cannot be turned back into passwords, so there is nothing to reverse
+        migrations.RunPython(hash_site_passwords, migrations.RunPython.noop),
+    ]
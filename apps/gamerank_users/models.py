@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -6,14 +7,18 @@ from typing import Optional
 
 
 class SitePassword(models.Model):
-    """Model for storing the site-wide password."""
-    value = models.CharField(max_length=128, unique=True)
+    """Model for storing the site-wide password, as a hash (see sitepassword.py)."""
+    value = models.CharField(max_length=128, unique=True, help_text="Password hash; use set_password().")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return "Site Password"
 
+    def set_password(self, raw_password: str) -> None:
+        """Store a hash of the password."""
+        self.value = make_password(raw_password)
+
 
 class UserProfile(models.Model):
     """Model for storing user preferences and settings."""
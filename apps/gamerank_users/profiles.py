@@ -0,0 +1,60 @@
+"""
+Display settings of the signed-in user, cached in their session.
+
+Every page renders the user's display name, font family and font size in the
+base layout. Reading them through ``request.user.profile`` costs a profile
+query per request; instead they are read once (at login, or on the first page
+of an older session) and kept in the session, which is loaded anyway.
+``UserSettingsView.post`` stores the new values after saving the form.
+
+The cached values are tagged with the session's user id so that a session
+reused by another user never shows the previous user's settings.
+
+Pages normally read them from the auth token (see authtoken.py), which
+carries a copy and is reissued when the session copy changes.
+"""
+from typing import Any, Dict
+
+from django.contrib.auth import SESSION_KEY
+
+from .models import UserProfile
+
+PROFILE_SESSION_KEY = 'profile_settings'
+DEFAULT_FONT_FAMILY = 'sans-serif'
+DEFAULT_FONT_SIZE = 'medium'
+
+
+def default_settings() -> Dict[str, Any]:
+    return {'display_name': '', 'font_family': DEFAULT_FONT_FAMILY, 'font_size': DEFAULT_FONT_SIZE}
+
+
+def get_profile_settings(request) -> Dict[str, Any]:
+    """Get the display settings for the request, reading the profile only if the session lacks them."""
+    session = getattr(request, 'session', None)
+    if session is None or not session.get('auth'):
+        return default_settings()
+    user_id = session.get(SESSION_KEY)
+    cached = session.get(PROFILE_SESSION_KEY)
+    if cached is not None and cached.get('user_id') == user_id:
+        return cached
+    profile = UserProfile.objects.select_related('user').filter(user_id=user_id).first()
+    if profile is None:
+        return default_settings()
+    return store_profile_settings(request, profile)
+
+
+def store_profile_settings(request, profile: UserProfile) -> Dict[str, Any]:
+    """Cache a profile's display settings in the session, e.g. after the user changes them."""
+    values = _settings_of(profile)
+    request.session[PROFILE_SESSION_KEY] = values
+    return values
+
+
+def _settings_of(profile: UserProfile) -> Dict[str, Any]:
+    return {
+        # Sessions store the user id as a string
+        'user_id': str(profile.user_id),
+        'display_name': profile.display_name,
+        'font_family': profile.font_family or DEFAULT_FONT_FAMILY,
+        'font_size': profile.font_size or DEFAULT_FONT_SIZE,
+    }
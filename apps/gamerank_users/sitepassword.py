@@ -0,0 +1,56 @@
+"""
+Verification of the site password against its stored hashes.
+
+``SitePassword`` rows hold password hashes (``SitePassword.set_password``),
+never the password itself. Checking a guess means running the slow password
+hasher once per row. Each process therefore remembers the outcome of recent
+checks, keyed by an HMAC of the guess so that no plaintext is kept in
+memory. A correct password is verified once per process and a repeated
+wrong guess costs nothing.
+
+Every check still reads the stored hashes (one query on a table of a row or
+two), and the remembered outcomes only hold for the exact hashes they were
+computed against. A password changed anywhere (the admin of another worker,
+the shell, a migration) therefore takes effect on the next check in every
+process, whatever the cache backend.
+"""
+import threading
+from typing import Dict, Tuple
+
+from django.contrib.auth.hashers import check_password
+from django.utils.crypto import salted_hmac
+
+from .models import SitePassword
+
+MAX_CACHED_RESULTS = 1024
+
+
+class _Verifier:
+    def __init__(self, hashes: Tuple[str, ...]) -> None:
+        self.hashes = hashes
+        self.results: Dict[str, bool] = {}
+
+
+_verifier = _Verifier(())
+_lock = threading.Lock()
+
+
+def check_site_password(raw_password: str) -> bool:
+    """Check a site password guess, hashing it only if this process has not checked it against these hashes."""
+    global _verifier
+    hashes = tuple(SitePassword.objects.order_by('pk').values_list('value', flat=True))
+    verifier = _verifier
+    if verifier.hashes != hashes:
+        verifier = _verifier = _Verifier(hashes)
+
+    digest = salted_hmac('gamerank.site-password', raw_password).hexdigest()
+    result = verifier.results.get(digest)
+    if result is not None:
+        return result
+
+    result = any(check_password(raw_password, encoded) for encoded in hashes)
+    with _lock:
+        if len(verifier.results) >= MAX_CACHED_RESULTS:
+            verifier.results.clear()
+        verifier.results[digest] = result
+    return result
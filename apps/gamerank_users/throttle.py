@@ -0,0 +1,75 @@
+"""
+Token-bucket throttling of login attempts, per client IP and per username.
+
+Each bucket holds up to ``CAPACITY`` attempts and refills at ``RATE`` attempts
+per minute (``settings.LOGIN_THROTTLE``). Every login POST takes one token
+from its IP's bucket and one from its username's bucket. The view checks the
+buckets before the form runs, so a flood is rejected with a 429 and never
+reaches the database or the password hasher. The IP bucket stops one client
+from guessing many passwords. The username bucket stops many clients from
+guessing one account's password.
+
+Buckets are kept in the Django cache, so every worker sees them when the
+backend is shared (file or Redis). Reading and writing a bucket is not one
+atomic step, so concurrent attempts can occasionally get one token more than
+the limit. That is acceptable for flood protection.
+"""
+import hashlib
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_LIMITS = {
+    'IP': {'CAPACITY': 20, 'RATE': 10},
+    'USERNAME': {'CAPACITY': 5, 'RATE': 2},
+}
+
+
+def bucket_key(scope: str, value: str) -> str:
+    digest = hashlib.md5(value.encode()).hexdigest()
+    return f'gamerank:login-throttle:{scope}:{digest}'
+
+
+def get_limits() -> Dict[str, Dict[str, float]]:
+    return getattr(settings, 'LOGIN_THROTTLE', DEFAULT_LIMITS)
+
+
+def take(scope: str, value: str, now: Optional[float] = None) -> float:
+    """Take a token from a bucket, returning 0 on success or the seconds until one is available."""
+    limits = get_limits().get(scope)
+    if not limits:
+        return 0
+    capacity = limits['CAPACITY']
+    per_second = limits['RATE'] / 60
+    now = time.time() if now is None else now
+    key = bucket_key(scope, value)
+
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * per_second)
+    if tokens < 1:
+        return (1 - tokens) / per_second
+    # Kept until the bucket would be full again, when it no longer matters
+    cache.set(key, (tokens - 1, now), int((capacity - tokens + 1) / per_second) + 1)
+    return 0
+
+
+def client_ip(request) -> str:
+    """Get the client's address, looking through the ``TRUSTED_PROXY_COUNT`` proxies in front of the app."""
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if proxies:
+        # Each proxy appends the address it received the request from
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def throttle_login(ip: str, username: str) -> float:
+    """Charge a login attempt to its IP and username, returning 0 or the seconds to wait."""
+    wait = take('IP', ip)
+    if wait:
+        # Rejected attempts do not drain the account's bucket for its real owner
+        return wait
+    return take('USERNAME', username.strip().lower())
@@ -1,12 +1,20 @@
+import math
+
 from django.shortcuts import render, redirect
 from django.views.generic import View, ListView, TemplateView
 from django.contrib.auth import login, logout # Import login
 from django.urls import reverse_lazy
 from .forms import LoginForm, UserSettingsForm # Needs to be created
+from .profiles import store_profile_settings
+from .throttle import client_ip, throttle_login
 from apps.gamerank_core.models import Vote, Follow # Import core models
+from apps.gamerank_core.pagination import KeysetPaginationMixin
+from apps.gamerank_core.recommendations import recommended_for
 from django.contrib.auth.mixins import LoginRequiredMixin # For class-based views
 from django.contrib.auth.decorators import login_required # For function-based views
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from apps.gamerank_core.etags import user_page_etag
 
 # Placeholder Views - Implement fully later
 
@@ -21,11 +29,22 @@ class LoginView(View):
         return render(request, self.template_name, {'form': form})
 
     def post(self, request, *args, **kwargs):
+        # Floods are turned away before the form touches the database or the hasher
+        wait = throttle_login(client_ip(request), request.POST.get('username', ''))
+        if wait:
+            form = self.form_class(initial={'username': request.POST.get('username', '')})
+            error = f"Too many login attempts. Try again in {math.ceil(wait)} seconds."
+            response = render(request, self.template_name, {'form': form, 'error': error}, status=429)
+            response['Retry-After'] = str(math.ceil(wait))
+            return response
+
         form = self.form_class(request.POST)
         if form.is_valid():
             user = form.cleaned_data['user']
             login(request, user) # Log in the Django user
             request.session['auth'] = True # Set our custom flag
+            # Cache the display settings so pages do not query the profile
+            store_profile_settings(request, user.profile)
             
             next_url = request.GET.get('next')
             if next_url:
@@ -44,33 +63,47 @@ class LogoutView(View):
 @method_decorator(login_required, name='dispatch')
 class UserDashboardView(TemplateView):
     template_name = 'gamerank_users/user_dashboard.html' # Needs to be created
-    # Add context later
+    # Session, user, stats, recommendations and profile
+    # settings (only without an auth token)
+    query_budget = 5
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Access request.user safely due to LoginRequiredMixin/decorator
         # The properties like votes_count are on the User model via add_to_class
+        # and read one UserStats row
+        context['recommended_games'] = recommended_for(self.request.user)
         return context
 
 @method_decorator(login_required, name='dispatch')
-class UserVotesView(ListView):
+@method_decorator(condition(etag_func=user_page_etag), name='get')
+class UserVotesView(KeysetPaginationMixin, ListView):
     model = Vote
     template_name = 'gamerank_users/user_votes.html' # Needs to be created
     context_object_name = 'votes'
     paginate_by = 10
+    cursor_ordering = ('-created_at', '-id')
+    # Session, user, ETag (user stats, unless cached), page (votes + games) and
+    # profile settings (only without an auth token)
+    query_budget = 5
 
     def get_queryset(self):
-        return Vote.objects.filter(user=self.request.user).order_by('-created_at')
+        return Vote.objects.filter(user=self.request.user).select_related('game')
 
 @method_decorator(login_required, name='dispatch')
-class UserFollowsView(ListView):
+@method_decorator(condition(etag_func=user_page_etag), name='get')
+class UserFollowsView(KeysetPaginationMixin, ListView):
     model = Follow
     template_name = 'gamerank_users/user_follows.html' # Needs to be created
     context_object_name = 'follows'
     paginate_by = 10
+    cursor_ordering = ('-created_at', '-id')
+    # Session, user, ETag (user stats, unless cached), page (follows + games) and
+    # profile settings (only without an auth token)
+    query_budget = 5
 
     def get_queryset(self):
-        return Follow.objects.filter(user=self.request.user).order_by('-created_at')
+        return Follow.objects.filter(user=self.request.user).select_related('game')
 
 @method_decorator(login_required, name='dispatch')
 class UserSettingsView(View):
@@ -84,6 +117,7 @@ class UserSettingsView(View):
     def post(self, request, *args, **kwargs):
         form = self.form_class(request.POST, instance=request.user.profile)
         if form.is_valid():
-            form.save()
+            profile = form.save()
+            store_profile_settings(request, profile)
             return redirect('gamerank_users:user_settings')
         return render(request, self.template_name, {'form': form})
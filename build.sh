@@ -13,4 +13,10 @@ python manage.py collectstatic --no-input
 python manage.py migrate gamerank_users 0002 --fake
 
 # Now apply all other pending migrations
-python manage.py migrate 
\ No newline at end of file
+python manage.py migrate 
+
+# Backfill denormalized per-game counters
+python manage.py rebuild_game_stats
+python manage.py rebuild_facet_counts
+python manage.py rebuild_user_stats
+python manage.py compact_activity --rebuild
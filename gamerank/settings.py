@@ -73,6 +73,13 @@ MIDDLEWARE = [
     'apps.gamerank_users.middleware.CustomAuthMiddleware',
 ]
 
+if DEBUG:
+    # Check views against their declared query budget (see gamerank_core.querybudget)
+    MIDDLEWARE.append('apps.gamerank_core.middleware.QueryBudgetMiddleware')
+
+# 'log' reports views over budget as warnings, 'raise' turns them into errors
+QUERY_BUDGET_MODE = 'log'
+
 ROOT_URLCONF = "gamerank.urls"
 
 TEMPLATES = [
@@ -86,11 +93,25 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                # Sign-in flag, display name and fonts without queries (see gamerank_users.authtoken)
+                "apps.gamerank_users.context_processors.auth_state",
             ],
         },
     },
 ]
 
+if not DEBUG:
+    # Parse each template once per process. Spelled out so production never
+    # depends on the default; in development Django also caches templates
+    # but clears them when a file changes.
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        ("django.template.loaders.cached.Loader", [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ]),
+    ]
+
 WSGI_APPLICATION = "gamerank.wsgi.application"
 
 
@@ -106,6 +127,37 @@ DATABASES = {
 }
 
 
+# Cache
+# CACHE_URL picks the backend: locmem:// (default, per process),
+# file:///path/to/dir, redis://host:6379/0 (any Redis-protocol server;
+# needs the redis package) or dummy:// (no caching).
+
+def _cache_from_url(url):
+    scheme, _, location = url.partition('://')
+    backends = {
+        'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+        'file': 'django.core.cache.backends.filebased.FileBasedCache',
+        'redis': 'django.core.cache.backends.redis.RedisCache',
+        'rediss': 'django.core.cache.backends.redis.RedisCache',
+        'dummy': 'django.core.cache.backends.dummy.DummyCache',
+    }
+    if scheme not in backends:
+        raise ValueError(f'Unsupported CACHE_URL scheme: {scheme}')
+    config = {'BACKEND': backends[scheme], 'TIMEOUT': 300}
+    if scheme in ('redis', 'rediss'):
+        config['LOCATION'] = url
+    elif location:
+        config['LOCATION'] = location
+    if scheme in ('locmem', 'file'):
+        config['OPTIONS'] = {'MAX_ENTRIES': 10000}
+    return config
+
+
+CACHES = {
+    'default': _cache_from_url(os.environ.get('CACHE_URL', 'locmem://')),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -168,6 +220,23 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Leaderboard ranking (see apps/gamerank_core/ranking.py).
+# Run `python manage.py rebuild_game_stats` after changing these values.
+GAMERANK_RANKING = {
+    'METHOD': 'bayesian',  # 'mean' or 'bayesian'
+    'PRIOR_MEAN': 2.5,
+    'PRIOR_WEIGHT': 5,
+}
+
+# Login attempts allowed per client IP and per username: bursts of CAPACITY,
+# refilled at RATE per minute (see apps/gamerank_users/throttle.py)
+LOGIN_THROTTLE = {
+    'IP': {'CAPACITY': 20, 'RATE': 10},
+    'USERNAME': {'CAPACITY': 5, 'RATE': 2},
+}
+# Proxies in front of the app that append to X-Forwarded-For (Render has one)
+TRUSTED_PROXY_COUNT = 0 if DEBUG else 1
+
 # Optional features
 ENABLE_FREETOGAME = False
 ENABLE_MMOBOMB = False
@@ -175,3 +244,30 @@ ENABLE_COMMENT_VOTING = False
 ENABLE_PLATFORM_FILTERING = False
 ENABLE_I18N = False
 ENABLE_PWA = False
+# Queue votes and apply them with `manage.py flush_vote_buffer` (see apps/gamerank_core/votes.py)
+ENABLE_VOTE_BUFFER = False
+# Serve cached pages to anonymous visitors (see apps/gamerank_core/caching.py)
+ENABLE_PAGE_CACHE = True
+# Let signed-in pages skip the session and user queries via a signed cookie (see apps/gamerank_users/authtoken.py)
+ENABLE_AUTH_TOKEN = True
+
+# JSON game feeds imported by `python manage.py import_feeds` (see apps/gamerank_ingestion/feeds.py).
+# Each source is also the prefix of its game ids; FORMAT names its field layout.
+# Listado 2 is imported on demand with `python manage.py import_listado2`.
+GAMERANK_FEEDS = {
+    'LIS2': {'URL': 'https://api.example.com/listado2.json', 'FORMAT': 'listado2', 'ENABLED': False},
+    'FTG': {'URL': 'https://www.freetogame.com/api/games', 'FORMAT': 'freetogame', 'ENABLED': ENABLE_FREETOGAME},
+    'MMO': {'URL': 'https://www.mmobomb.com/api1/games', 'FORMAT': 'freetogame', 'ENABLED': ENABLE_MMOBOMB},
+}
+# Feed downloads: timeouts in seconds, attempts with exponential backoff from BACKOFF
+# to MAX_BACKOFF seconds, pooled connections and requests in flight per host
+# (see apps/gamerank_ingestion/fetch.py)
+GAMERANK_FETCH = {
+    'TIMEOUT': 30,
+    'CONNECT_TIMEOUT': 5,
+    'ATTEMPTS': 4,
+    'BACKOFF': 1,
+    'MAX_BACKOFF': 30,
+    'MAX_CONNECTIONS': 10,
+    'PER_HOST': 2,
+}